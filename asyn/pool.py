@@ -2,6 +2,7 @@ import asyncio
 from contextlib import asynccontextmanager
 
 from DogeOpsPy.asyn.semaphore import InfiniteSemaphore
+from DogeOpsPy.profiling import trace
 from DogeOpsPy.verification.type import is_hashable
 
 # =============================================================================
@@ -179,18 +180,20 @@ class LeasePoolV1(ResPoolV1):
         sem_acquired = False
 
         try:
-            try:
-                await asyncio.wait_for(self._lease_sem.acquire(), timeout)
-                sem_acquired = True
-            except asyncio.TimeoutError:
-                raise asyncio.TimeoutError(f"LeasePoolV1::No lease quota in {timeout}s.")
-            try:
-                lease_target = await self.get(timeout)
-                async with self._lease_change_lock:
-                    self._in_lease.add(lease_target)
-            except asyncio.TimeoutError:
-                raise asyncio.TimeoutError(f"LeasePoolV1::No resource in pool for {timeout}s.")
-            yield lease_target
+            with trace.span("pool.lease_wait"):
+                try:
+                    await asyncio.wait_for(self._lease_sem.acquire(), timeout)
+                    sem_acquired = True
+                except asyncio.TimeoutError:
+                    raise asyncio.TimeoutError(f"LeasePoolV1::No lease quota in {timeout}s.")
+                try:
+                    lease_target = await self.get(timeout)
+                    async with self._lease_change_lock:
+                        self._in_lease.add(lease_target)
+                except asyncio.TimeoutError:
+                    raise asyncio.TimeoutError(f"LeasePoolV1::No resource in pool for {timeout}s.")
+            with trace.span("pool.lease_hold"):
+                yield lease_target
         finally:
             if sem_acquired:  # Once user exits async with, concurrent limit immediately release
                 self._lease_sem.release()
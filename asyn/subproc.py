@@ -4,6 +4,8 @@ import sys
 import time
 from typing import Optional, List
 
+from DogeOpsPy.profiling import trace
+
 
 # Meant to be one-time-disposal
 class InteractiveProcV1:
@@ -60,6 +62,7 @@ class InteractiveProcV1:
 
 
     # ===== SYSTEM COMPONENTS =====
+    @trace.traced("proc.run")
     async def run(self, debug=False):
         # watchdog won't clean themselves, I need to clean in a shield
         timeout_watchdog: Optional[asyncio.Task] = None
@@ -90,6 +93,7 @@ class InteractiveProcV1:
             except asyncio.TimeoutError:
                 pass
 
+            trace.current().set(pid=getattr(self.proc, "pid", -1), rc=rc)
             return rc, self.error_message, self.logs
 
 
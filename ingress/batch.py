@@ -0,0 +1,148 @@
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from DogeOpsPy.ingress import envoy_loader, nginx
+from DogeOpsPy.ingress.record import ServerRecord
+
+# =============================================================================
+# ConfigBatchParserV1 — parse many hosts' ingress configs on every core (user guide)
+# =============================================================================
+# Parsing is pure python and CPU bound, so hosts are spread over a process pool.
+# Raw bytes go in, a compact tuple form comes back (cheap to pickle) and is turned back
+# into the usual server dicts in the parent. Small batches skip the pool entirely.
+#
+# -----------------------------------------------------------------------------
+# Init Options:
+#   workers.           # Pool size, default os.cpu_count(); 1 = always in-process
+#   inline_bytes.      # Total raw size under which the batch is parsed in-process
+#   max_pending.       # Jobs submitted ahead of the consumer, bounds memory on huge fleets
+#   compact.           # True: servers are interned ServerRecord (ingress.record), not dicts
+#
+# -----------------------------------------------------------------------------
+# Methods:
+# for result in instance.parse(items):   # BatchResult per host, in completion order
+# instance.parse_all(items).             # {host: BatchResult}
+#
+# items: iterable of (host, kind, raw); kind is "nginx" (raw `nginx -T`) or "envoy"
+#        (raw envoy yaml/json); raw is str or bytes.
+#
+# -----------------------------------------------------------------------------
+# QuickStart:
+# parser = ConfigBatchParserV1()
+# items = [("edge-1", "nginx", t1), ("edge-2", "nginx", t2), ("mesh-1", "envoy", y1)]
+# for r in parser.parse(items):
+#     print(r.host, r.error or len(r.servers), f"{r.elapsed:.3f}s")
+#
+# -----------------------------------------------------------------------------
+# NOTES:
+# 1) With the "spawn" start method (macOS/Windows) the pool imports DogeOpsPy in every
+#    worker, keep the entry point under `if __name__ == "__main__":`.
+# 2) A host whose config fails to parse yields a BatchResult with `error`, it never raises.
+
+
+class BatchResult:
+    __slots__ = ("host", "kind", "servers", "error", "elapsed")
+
+    def __init__(self, host, kind, servers=None, error="", elapsed=0.0):
+        self.host = host
+        self.kind = kind
+        self.servers = servers if servers is not None else []
+        self.error = error
+        self.elapsed = elapsed
+
+    def __repr__(self):
+        return f"BatchResult({self.host!r}, {self.kind}, servers={len(self.servers)}, error={self.error!r})"
+
+
+def parse_raw(kind, raw):
+    """Parse one raw config into server dicts, in this process."""
+    if kind == "envoy":
+        return envoy_loader.raw_to_server_dicts(raw)
+    if isinstance(raw, (bytes, bytearray, memoryview)):
+        raw = bytes(raw).decode("utf-8", errors="replace")
+    if kind == "nginx":
+        return nginx.T_to_server_dicts(raw)
+    raise ValueError(f"Unknown config kind {kind!r}, use 'nginx' or 'envoy'")
+
+
+def pack_servers(servers):
+    return tuple(
+        (tuple(s["listen"].items()), s["ssl"], s["proxy_protocol"], tuple(s["proxy"]), tuple(s["l7"]))
+        for s in servers
+    )
+
+
+def unpack_servers(packed, compact=False):
+    if compact:
+        return [ServerRecord(*fields) for fields in packed]
+    return [
+        {"listen": dict(listen), "ssl": ssl, "proxy_protocol": pp, "proxy": list(proxy), "l7": list(l7)}
+        for listen, ssl, pp, proxy, l7 in packed
+    ]
+
+
+def _parse_job(job):
+    # Runs in a pool worker: must stay module level (picklable) and never raise
+    host, kind, raw = job
+    t0 = time.monotonic()
+    try:
+        return host, kind, pack_servers(parse_raw(kind, raw)), "", time.monotonic() - t0
+    except Exception as e:
+        return host, kind, (), f"{type(e).__name__}: {e}", time.monotonic() - t0
+
+
+class ConfigBatchParserV1:
+    def __init__(self, workers=None, inline_bytes=2 * 1024 * 1024, max_pending=None, compact=False):
+        # INPUT
+        self.workers = workers or os.cpu_count() or 1
+        self.inline_bytes = inline_bytes
+        self.max_pending = max_pending or self.workers * 4
+        self.compact = compact
+
+    def parse(self, items):
+        items = iter(items)
+        if self.workers <= 1:
+            for item in items:
+                yield self._result(_parse_job(self._job(item)))
+            return
+
+        # Peek until we know the batch is big enough to pay for a pool
+        head = []
+        head_bytes = 0
+        for job in items:
+            head.append(self._job(job))
+            head_bytes += len(head[-1][2])
+            if head_bytes >= self.inline_bytes:
+                break
+        else:
+            for job in head:
+                yield self._result(_parse_job(job))
+            return
+
+        jobs = itertools.chain(head, (self._job(item) for item in items))
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            pending = set()
+            for job in itertools.islice(jobs, self.max_pending):
+                pending.add(executor.submit(_parse_job, job))
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for job in itertools.islice(jobs, len(done)):
+                    pending.add(executor.submit(_parse_job, job))
+                for future in done:
+                    yield self._result(future.result())
+
+    def parse_all(self, items):
+        return {result.host: result for result in self.parse(items)}
+
+    @staticmethod
+    def _job(item):
+        host, kind, raw = item
+        if isinstance(raw, str):
+            raw = raw.encode("utf-8")
+        return host, kind, raw
+
+    def _result(self, packed):
+        host, kind, servers, error, elapsed = packed
+        return BatchResult(host, kind, unpack_servers(servers, self.compact), error, elapsed)
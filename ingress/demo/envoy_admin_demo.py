@@ -0,0 +1,92 @@
+# envoy_admin_demo.py
+# A local stand-in for the envoy admin port serving a canned /config_dump, and
+# EnvoyAdminClientV1 polling it: first pull, probe skip, xDS update, same-hash dump.
+# python -m DogeOpsPy.ingress.demo.envoy_admin_demo
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from DogeOpsPy.ingress.envoy_admin import EnvoyAdminClientV1
+
+T = "type.googleapis.com/envoy.admin.v3."
+
+
+def canned_dump(n, lds_version):
+    listeners, routes, clusters, endpoints = [], [], [], []
+    for i in range(n):
+        listeners.append({"name": f"l{i}", "active_state": {"version_info": lds_version, "listener": {
+            "name": f"l{i}",
+            "address": {"socket_address": {"address": "0.0.0.0", "port_value": 10000 + i}},
+            "filter_chains": [{"filters": [{
+                "name": "envoy.filters.network.http_connection_manager",
+                "typed_config": {"stat_prefix": f"l{i}", "rds": {"route_config_name": f"r{i}"}},
+            }]}],
+        }}})
+        routes.append({"version_info": "1", "route_config": {"name": f"r{i}", "virtual_hosts": [
+            {"name": "vh", "domains": [f"svc{i}.local"], "routes": [{"match": {"prefix": "/"}, "route": {"cluster": f"c{i}"}}]}
+        ]}})
+        clusters.append({"version_info": "1", "cluster": {"name": f"c{i}", "type": "EDS", "eds_cluster_config": {}}})
+        endpoints.append({"endpoint_config": {"cluster_name": f"c{i}", "endpoints": [{"lb_endpoints": [
+            {"endpoint": {"address": {"socket_address": {"address": f"10.0.{i // 250}.{i % 250}", "port_value": 8080}}}}
+        ]}]}})
+    return json.dumps({"configs": [
+        {"@type": T + "BootstrapConfigDump", "bootstrap": {"admin": {}, "node": {"id": "demo"}}},
+        {"@type": T + "ClustersConfigDump", "dynamic_active_clusters": clusters},
+        {"@type": T + "ListenersConfigDump", "version_info": lds_version, "dynamic_listeners": listeners},
+        {"@type": T + "RoutesConfigDump", "dynamic_route_configs": routes},
+        {"@type": T + "SecretsConfigDump"},
+        {"@type": T + "EndpointsConfigDump", "dynamic_endpoint_configs": endpoints},
+    ]}, indent=1).encode()
+
+
+class StandIn:
+    def __init__(self):
+        self.version = "1"
+        self.dump = canned_dump(2000, self.version)
+        self.requests = []
+
+    def handler(self):
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stand_in.requests.append(self.path)
+                if self.path.startswith("/stats"):
+                    body = f"listener_manager.lds.version: {hash(stand_in.version) & 0xffffffff}\n".encode()
+                else:
+                    body = stand_in.dump
+                self.send_response(200)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    stand_in = StandIn()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), stand_in.handler())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    admin = EnvoyAdminClientV1(f"http://127.0.0.1:{server.server_port}")
+
+    servers = admin.server_dicts()
+    print("first pull  :", len(servers), "listeners, changed =", admin.changed, servers[0])
+    admin.server_dicts()
+    print("same version:", admin.changed, admin.stats())
+
+    stand_in.version = "2"
+    stand_in.dump = canned_dump(2001, stand_in.version)
+    servers = admin.server_dicts()
+    print("lds update  :", len(servers), "listeners, changed =", admin.changed, admin.stats())
+
+    stand_in.version = "3"  # version moved, dump identical
+    admin.server_dicts()
+    print("same dump   :", admin.changed, admin.stats())
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
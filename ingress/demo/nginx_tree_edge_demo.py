@@ -0,0 +1,44 @@
+# nginx_tree_edge_demo.py
+# Truncated / hostile input for the nginx tokenizer: a trailing backslash and unterminated
+# quotes must come back fast and keep the statement, not hang or drop it.
+# python -m DogeOpsPy.ingress.demo.nginx_tree_edge_demo
+import time
+
+from DogeOpsPy.ingress.nginx_tree import parse_T, parse_conf, split_statements, split_words
+
+CASES = [
+    # (text, expected split_statements() without the final ("", ""))
+    ("location ~ " + "a b" * 4 + "\\", [("location ~ " + "a b" * 4 + "\\", "")]),
+    ("location ~ " + "a b" * 20000 + "\\", [("location ~ " + "a b" * 20000 + "\\", "")]),
+    ('server_name "abc', [('server_name "abc', "")]),
+    ('server_name "ab\\', [('server_name "ab\\', "")]),
+    ("return 200 'a", [("return 200 'a", "")]),
+    ("listen 80; server_name x \\", [("listen 80", ";"), (" server_name x \\", "")]),
+    ('proxy_pass http://a; set $x "b" + "c\\" d', [("proxy_pass http://a", ";"), (' set $x "b" + "c\\" d', "")]),
+]
+
+
+def main():
+    for text, expected in CASES:
+        t0 = time.perf_counter()
+        statements = split_statements(text)
+        elapsed = time.perf_counter() - t0
+        assert statements[:-1] == expected and statements[-1] == ("", ""), (text[:40], statements[:3])
+        assert elapsed < 0.5, (text[:40], elapsed)
+        print(f"{elapsed * 1000:8.3f} ms  {text[:48]!r}")
+
+    assert split_words("server_name a\\") == ["server_name", "a\\"]
+    assert split_words('server_name "ab\\') == ["server_name", "ab\\"]
+
+    # Whole parse: a truncated dump still yields the servers that were complete
+    T = ("nginx: the configuration file /etc/nginx/nginx.conf syntax is ok\n"
+         "# configuration file /etc/nginx/nginx.conf:\n"
+         "http { server { listen 80; server_name a; } server { listen 81; server_name \"b\\")
+    servers = parse_T(T).find_blocks("server")
+    assert [s.find("listen")[0].args for s in servers] == [["80"], ["81"]], servers
+    assert parse_conf("events { worker_connections 1024; } \\").find_blocks("events")
+    print("truncated dump: servers kept, no hang")
+
+
+if __name__ == "__main__":
+    main()
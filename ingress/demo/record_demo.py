@@ -0,0 +1,62 @@
+# record_demo.py
+# Memory of a fleet inventory: plain server dicts vs interned ServerRecord.
+# python -m DogeOpsPy.ingress.demo.record_demo [hosts] [servers_per_host]
+import gc
+import sys
+import time
+import tracemalloc
+
+from DogeOpsPy.ingress import nginx
+from DogeOpsPy.ingress.record import clear_interned
+
+
+def fake_T(host_no, servers):
+    # Same layout on every host, like a real fleet rolled out from one template
+    lines = ["nginx: the configuration file /etc/nginx/nginx.conf syntax is ok",
+             "nginx: configuration file /etc/nginx/nginx.conf test is successful",
+             "# configuration file /etc/nginx/nginx.conf:", "http {"]
+    for i in range(servers // 10):
+        lines.append(f"upstream app_{i} {{ server 10.1.{i % 250}.1:8080; server 10.1.{i % 250}.2:8080; }}")
+    for i in range(servers):
+        lines += [
+            "server {",
+            f"    listen {8000 + i % 50} ssl;",
+            f"    listen [::]:{8000 + i % 50} ssl;",
+            f"    ssl_certificate /etc/nginx/ssl/site_{i % 40}.crt;",
+            f"    ssl_certificate_key /etc/nginx/ssl/site_{i % 40}.key;",
+            f"    location / {{ proxy_pass http://app_{i % (servers // 10)}; }}",
+            f"    location /static/ {{ proxy_pass http://10.2.{host_no % 250}.{i % 250}:9000; }}",
+            "}",
+        ]
+    lines.append("}")
+    return "\n".join(lines)
+
+
+def measure(hosts, servers, compact):
+    dumps = [fake_T(h, servers) for h in range(hosts)]
+    gc.collect()
+    tracemalloc.start()
+    t0 = time.monotonic()
+    inventory = {f"host-{h}": nginx.T_to_server_dicts(dump, compact=compact) for h, dump in enumerate(dumps)}
+    elapsed = time.monotonic() - t0
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    listeners = sum(len(servers) for servers in inventory.values())
+    del inventory
+    clear_interned()
+    return size, elapsed, listeners
+
+
+def main():
+    hosts = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    servers = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    for compact in (False, True):
+        size, elapsed, listeners = measure(hosts, servers, compact)
+        name = "ServerRecord" if compact else "dict"
+        print(f"{name:>12}: {listeners} listeners, {size / 1024 / 1024:8.1f} MiB, "
+              f"{size / listeners:6.0f} B/listener, parse {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
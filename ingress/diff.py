@@ -0,0 +1,257 @@
+import hashlib
+import json
+import zlib
+
+from DogeOpsPy.ingress.index import normalize_backend
+
+# =============================================================================
+# ConfigSnapshot / diff_snapshots — structural diff of ingress parse results (user guide)
+# =============================================================================
+# Each listener (server dict / ServerRecord) is normalized (proxy and l7 sorted and de-duped,
+# backends normalized, listen sorted) and fingerprinted, field by field. Listeners are keyed
+# by their listen addresses (flags such as ssl / http2 are the "listen" field); several nginx
+# server blocks on the same addresses are matched by fingerprint first, so reordering never
+# shows up as a change.
+# A snapshot only keeps fingerprints + the backend set, it is what you store between polls:
+# the next poll is diffed against it without the previous dicts.
+#
+# Cost: one pass to fingerprint the new parse result (you parsed it anyway). The diff itself:
+# whole snapshot digest (equal -> nothing to do), then BUCKETS bucket digests (listen keys and
+# backends are spread over buckets by crc32), then only the keys of buckets that differ.
+# A handful of changed listeners costs a handful of buckets, not a walk over every listener.
+#
+# -----------------------------------------------------------------------------
+# Functions:
+# snapshot(server_dicts)              # -> ConfigSnapshot
+# diff_snapshots(old, new)            # -> ConfigDiff
+# diff_servers(old, new)              # old/new: server dicts or snapshots
+#
+# ConfigSnapshot: .digest, .to_json(), ConfigSnapshot.from_json(text)
+# ConfigDiff:     .added / .removed / .changed   # [ListenerChange, ...]
+#                 .backends_added / .backends_removed
+#                 bool(diff), diff.summary()
+#
+# -----------------------------------------------------------------------------
+# QuickStart:
+# last = ConfigSnapshot.from_json(open(f"{host}.fp.json").read())
+# current = snapshot(nginx.T_to_server_dicts(fetch_T(host)))
+# changes = diff_snapshots(last, current)
+# if changes:
+#     print(host, changes.summary())
+#     for change in changes.changed:
+#         print(change.listen, change.fields, change.server and change.server["proxy"])
+# open(f"{host}.fp.json", "w").write(current.to_json())
+#
+# -----------------------------------------------------------------------------
+# NOTES:
+# 1) ListenerChange.server is the new-side dict/record when the new side was built from
+#    server dicts in this process, None for anything rebuilt from JSON.
+# 2) "changed" means same listen addresses, different content; `fields` says which
+#    (adding ssl / http2 to `listen 443` is a change of "listen", not a remove + add).
+
+DIFF_FIELDS = ("listen", "ssl", "proxy_protocol", "proxy", "l7")
+BUCKETS = 1024
+
+
+def _fp(value):
+    return hashlib.sha1(repr(value).encode("utf-8", errors="replace")).hexdigest()[:16]
+
+
+def normalize_server(server):
+    """Server dict / ServerRecord -> (listen_key, {field: normalized value})."""
+    listen = tuple(sorted(server.get("listen", {}).items()))
+    listen_key = ",".join(address for address, _ in listen)
+    fields = {
+        "listen": listen,
+        "ssl": ";".join(sorted(p for p in server.get("ssl", "").split(";") if p)),
+        "proxy_protocol": bool(server.get("proxy_protocol", False)),
+        "proxy": tuple(sorted({normalize_backend(target) for target in server.get("proxy", ())})),
+        "l7": tuple(sorted(set(server.get("l7", ())))),
+    }
+    return listen_key, fields
+
+
+def _bucket(key):
+    return zlib.crc32(key.encode("utf-8", errors="replace")) % BUCKETS
+
+
+def _bucketed(items):
+    """{key: value} -> ({bucket: {key: value}}, {bucket: digest})"""
+    buckets = {}
+    for key, value in items:
+        buckets.setdefault(_bucket(key), {})[key] = value
+    return buckets, {bucket: _fp(sorted(entries.items())) for bucket, entries in buckets.items()}
+
+
+def _changed_buckets(old_digests, new_digests):
+    return sorted(bucket for bucket in old_digests.keys() | new_digests.keys()
+                  if old_digests.get(bucket) != new_digests.get(bucket))
+
+
+class ListenerPrint:
+    __slots__ = ("fp", "fields", "server")
+
+    def __init__(self, fp, fields, server=None):
+        self.fp = fp  # fingerprint of the whole normalized listener
+        self.fields = fields  # {field: fingerprint}
+        self.server = server
+
+
+class ConfigSnapshot:
+    def __init__(self, listeners=None, backends=None):
+        # DataStructures
+        self.listeners = listeners or {}  # listen_key -> [ListenerPrint, ...] sorted by fp
+        self.backends = backends or {}  # normalized backend -> number of listeners using it
+        # bucket -> {listen_key: fingerprint of its ListenerPrint group} / {backend: count}, + digests
+        self.buckets, self.bucket_digests = _bucketed(
+            (key, _fp([p.fp for p in prints])) for key, prints in self.listeners.items())
+        self.backend_buckets, self.backend_digests = _bucketed(self.backends.items())
+        self.digest = _fp((sorted(self.bucket_digests.items()), sorted(self.backend_digests.items())))
+
+    @classmethod
+    def from_servers(cls, server_dicts):
+        listeners = {}
+        backends = {}
+        for server in server_dicts:
+            listen_key, fields = normalize_server(server)
+            field_prints = {name: _fp(fields[name]) for name in DIFF_FIELDS}
+            print_ = ListenerPrint(_fp(tuple(field_prints[name] for name in DIFF_FIELDS)), field_prints, server)
+            listeners.setdefault(listen_key, []).append(print_)
+            for backend in fields["proxy"]:
+                backends[backend] = backends.get(backend, 0) + 1
+        for prints in listeners.values():
+            prints.sort(key=lambda p: p.fp)
+        return cls(listeners, backends)
+
+    # ===== storage =====
+    def to_dict(self):
+        return {
+            "digest": self.digest,
+            "listeners": {key: [[p.fp, p.fields] for p in prints] for key, prints in self.listeners.items()},
+            "backends": self.backends,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        listeners = {key: [ListenerPrint(fp, fields) for fp, fields in prints]
+                     for key, prints in data.get("listeners", {}).items()}
+        return cls(listeners, dict(data.get("backends", {})))
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), separators=(",", ":"), sort_keys=True)
+
+    @classmethod
+    def from_json(cls, text):
+        return cls.from_dict(json.loads(text))
+
+    def __len__(self):
+        return sum(len(prints) for prints in self.listeners.values())
+
+    def __eq__(self, other):
+        return isinstance(other, ConfigSnapshot) and self.digest == other.digest
+
+    def __hash__(self):
+        return hash(self.digest)
+
+
+class ListenerChange:
+    __slots__ = ("listen", "kind", "fields", "old_fp", "new_fp", "server")
+
+    def __init__(self, listen, kind, fields=(), old_fp="", new_fp="", server=None):
+        self.listen = listen
+        self.kind = kind  # "added" / "removed" / "changed"
+        self.fields = fields  # changed fields, () for added/removed
+        self.old_fp = old_fp
+        self.new_fp = new_fp
+        self.server = server
+
+    def __repr__(self):
+        extra = f", fields={list(self.fields)}" if self.fields else ""
+        return f"ListenerChange({self.kind}, {self.listen!r}{extra})"
+
+
+class ConfigDiff:
+    def __init__(self):
+        self.added = []
+        self.removed = []
+        self.changed = []
+        self.backends_added = []
+        self.backends_removed = []
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.changed or self.backends_added or self.backends_removed)
+
+    def summary(self):
+        return {
+            "listeners_added": len(self.added),
+            "listeners_removed": len(self.removed),
+            "listeners_changed": len(self.changed),
+            "backends_added": len(self.backends_added),
+            "backends_removed": len(self.backends_removed),
+        }
+
+    def __repr__(self):
+        return f"ConfigDiff({self.summary()})"
+
+
+def snapshot(server_dicts):
+    return ConfigSnapshot.from_servers(server_dicts)
+
+
+def diff_snapshots(old, new):
+    result = ConfigDiff()
+    if old.digest == new.digest:
+        return result
+
+    for bucket in _changed_buckets(old.bucket_digests, new.bucket_digests):
+        old_groups, new_groups = old.buckets.get(bucket, {}), new.buckets.get(bucket, {})
+        for key in sorted(new_groups.keys() - old_groups.keys()):
+            result.added.extend(ListenerChange(key, "added", new_fp=p.fp, server=p.server) for p in new.listeners[key])
+        for key in sorted(old_groups.keys() - new_groups.keys()):
+            result.removed.extend(ListenerChange(key, "removed", old_fp=p.fp) for p in old.listeners[key])
+        for key in sorted(new_groups.keys() & old_groups.keys()):
+            if old_groups[key] != new_groups[key]:
+                _diff_group(key, old.listeners[key], new.listeners[key], result)
+
+    for bucket in _changed_buckets(old.backend_digests, new.backend_digests):
+        old_backends, new_backends = old.backend_buckets.get(bucket, {}), new.backend_buckets.get(bucket, {})
+        result.backends_added.extend(new_backends.keys() - old_backends.keys())
+        result.backends_removed.extend(old_backends.keys() - new_backends.keys())
+    result.backends_added.sort()
+    result.backends_removed.sort()
+    return result
+
+
+def _diff_group(key, old_prints, new_prints, result):
+    # Same listen addresses: drop identical listeners, pair what's left in fingerprint order
+    new_fps = {}
+    for p in new_prints:
+        new_fps[p.fp] = new_fps.get(p.fp, 0) + 1
+    old_left = []
+    for p in old_prints:
+        if new_fps.get(p.fp):
+            new_fps[p.fp] -= 1
+        else:
+            old_left.append(p)
+    new_left = []
+    for p in new_prints:
+        if new_fps.get(p.fp, 0) > 0:
+            new_fps[p.fp] -= 1
+            new_left.append(p)
+
+    for old_p, new_p in zip(old_left, new_left):
+        fields = tuple(name for name in DIFF_FIELDS if old_p.fields.get(name) != new_p.fields.get(name))
+        result.changed.append(ListenerChange(key, "changed", fields, old_p.fp, new_p.fp, new_p.server))
+    for new_p in new_left[len(old_left):]:
+        result.added.append(ListenerChange(key, "added", new_fp=new_p.fp, server=new_p.server))
+    for old_p in old_left[len(new_left):]:
+        result.removed.append(ListenerChange(key, "removed", old_fp=old_p.fp))
+
+
+def diff_servers(old, new):
+    """old/new: server dicts (or records) or ConfigSnapshot, any mix."""
+    if not isinstance(old, ConfigSnapshot):
+        old = snapshot(old)
+    if not isinstance(new, ConfigSnapshot):
+        new = snapshot(new)
+    return diff_snapshots(old, new)
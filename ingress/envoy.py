@@ -2,6 +2,33 @@ import json
 import re
 import traceback
 
+from DogeOpsPy.ingress.record import to_records
+from DogeOpsPy.profiling import trace
+
+_CONFIG_PATH = re.compile(r"(/\S+\.(yaml|yml))")
+
+def _container_cmdline(container):
+    # `docker inspect` object: Path + Args (what actually runs), else Config.Cmd;
+    # socket /containers/json item: Command is already the joined string
+    if isinstance(container.get("Command"), str):
+        return container["Command"]
+    config = container.get("Config") or {}
+    path = container.get("Path", "")
+    args = container.get("Args") or []
+    cmd = config.get("Cmd") or []
+
+    # Prioritize actual running command
+    if path and args:
+        full_cmd = [path] + args
+    else:
+        full_cmd = cmd
+    return " ".join(full_cmd)
+
+def _cmdline_config_path(cmdline):
+    # Regex match yaml/yml path (non-greedy, allows quoting)
+    match = _CONFIG_PATH.search(cmdline)
+    return match.group(1) if match else ""
+
 def docker_inspect_to_envoy_config_path(inspect_str):
     envoy_config_path = ""
     try:
@@ -10,29 +37,40 @@ def docker_inspect_to_envoy_config_path(inspect_str):
             raise ValueError("Unexpected JSON structure")
 
         container = inspect_obj[0]  # Should be only one in list
-        config = container.get("Config", {})
-        path = container.get("Path", "")
-        args = container.get("Args", [])
-        cmd = config.get("Cmd", [])
-
-        # Prioritize actual running command
-        if path and args:
-            full_cmd = [path] + args
-        else:
-            full_cmd = cmd
-
-        cmdline = " ".join(full_cmd)
-
-        # Regex match yaml/yml path (non-greedy, allows quoting)
-        match = re.search(r"(/\S+\.(yaml|yml))", cmdline)
-        if match:
-            envoy_config_path = match.group(1)
+        envoy_config_path = _cmdline_config_path(_container_cmdline(container))
 
     except Exception:
         print(f"docker_inspect_to_envoy_config_path FAULT: {traceback.format_exc()}")
 
     return envoy_config_path
 
+def is_envoy_container(container):
+    image = container.get("Image") or ""
+    if not isinstance(container.get("Command"), str):
+        image = (container.get("Config") or {}).get("Image") or image
+    return "envoy" in image.lower() or "envoy" in _container_cmdline(container).lower()
+
+def docker_inspect_to_envoy_config_paths(inspect_str):
+    """
+    Every container of one multi-container `docker inspect a b c ...` (or of the docker socket
+    GET /containers/json list) in one json.loads -> {container_id: config_path} for the
+    Envoy ones ("" when no yaml path is on their command line).
+    """
+    envoy_config_paths = {}
+    try:
+        containers = json.loads(inspect_str) if isinstance(inspect_str, (str, bytes, bytearray)) else inspect_str
+        if not isinstance(containers, list):
+            raise ValueError("Unexpected JSON structure")
+
+        for container in containers:
+            if isinstance(container, dict) and is_envoy_container(container):
+                envoy_config_paths[container.get("Id", "")] = _cmdline_config_path(_container_cmdline(container))
+
+    except Exception:
+        print(f"docker_inspect_to_envoy_config_paths FAULT: {traceback.format_exc()}")
+
+    return envoy_config_paths
+
 def conf_to_clusters(envoy_config):
     clusters = {}
     try:
@@ -55,7 +93,8 @@ def conf_to_clusters(envoy_config):
         print(traceback.format_exc())
     return clusters
 
-def conf_to_server_dicts(conf_dict):
+@trace.traced("envoy.server_dicts")
+def conf_to_server_dicts(conf_dict, compact=False):
     if not isinstance(conf_dict, dict):
         raise ValueError("conf_to_server_dicts takes a yaml.safe_load() dict!!!")
 
@@ -172,4 +211,5 @@ def conf_to_server_dicts(conf_dict):
 
         output.append(listen_entry)
 
-    return output
+    # compact=True: interned ServerRecord (read-only Mapping) instead of dicts, see ingress.record
+    return to_records(output) if compact else output
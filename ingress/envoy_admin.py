@@ -0,0 +1,338 @@
+import codecs
+import hashlib
+import json
+import re
+import time
+import urllib.parse
+
+from DogeOpsPy.ingress import envoy
+from DogeOpsPy.profiling import trace
+
+# =============================================================================
+# EnvoyAdminClientV1 — envoy admin /config_dump -> server dicts, xDS included (user guide)
+# =============================================================================
+# The yaml file only has what envoy booted with; listeners/clusters/routes/endpoints pushed
+# over xDS only show up in the admin /config_dump. This reads that dump into the same
+# server dicts as envoy.conf_to_server_dicts():
+#   listeners   static_listeners + dynamic_listeners (active, else warming state)
+#   routes      RDS route configs are put back into their http_connection_manager
+#   clusters    static + dynamic active clusters, EDS endpoints put back as load_assignment
+#
+# The dump is read as a stream: only the listener/cluster/route/endpoint entries are
+# decoded (one at a time, json in C), bootstrap/secrets/... are decoded and dropped on the
+# way, the dump as a whole is never in memory as text nor as one dict tree.
+#
+# Re-fetch is conditional:
+#   1) GET /stats?filter=...version  (lds/cds/rds/eds version hashes): unchanged -> cached result
+#   2) GET /config_dump, sends If-None-Match when a proxy in front gave an ETag, 304 -> cached
+#   3) sha1 of the dump bytes: same dump -> the cached list is returned as is (same object)
+#
+# -----------------------------------------------------------------------------
+# Init Options:
+#   admin_url.      # "http://127.0.0.1:9901"
+#   timeout.        # Per request (sec)
+#   include_eds.    # Ask for endpoint assignments (?include_eds), needed for EDS clusters
+#   probe.          # Check xDS versions via /stats before pulling the dump
+#   refresh_every.  # Full pull anyway after this many probe skips (static config, restarts)
+#   compact.        # True: ServerRecord (ingress.record) instead of dicts
+#
+# -----------------------------------------------------------------------------
+# Methods:
+# instance.server_dicts(force=False)      # -> [server_dict, ...]
+# instance.changed                        # did the last call see a new dump
+# instance.stats()                        # {"fetches":..., "probe_skips":..., "not_modified":..., "same_hash":...}
+#
+# config_dump_to_server_dicts(source)     # bytes / str / file object / iterable of chunks
+# iter_config_dump(chunks)                # -> ("listener"|"cluster"|"route"|"endpoint", dict)
+#
+# -----------------------------------------------------------------------------
+# QuickStart:
+# admin = EnvoyAdminClientV1("http://10.0.0.5:9901")
+# servers = admin.server_dicts()
+# servers = config_dump_to_server_dicts(open("config_dump.json", "rb"))
+# servers = config_dump_to_server_dicts(ssh_conn.iter_exec("curl -s localhost:9901/config_dump?include_eds"))
+#
+# -----------------------------------------------------------------------------
+# NOTES:
+# 1) Version stats don't move when envoy restarts with a new static file, refresh_every
+#    bounds how long that can go unnoticed.
+# 2) SDS certificates have no file path in the dump, they don't show up in "ssl".
+
+CHUNK_SIZE = 65536
+
+# Array key in a config_dump section -> kind of resource its entries hold
+_ITEM_ARRAYS = {
+    "static_listeners": "listener",
+    "dynamic_listeners": "listener",
+    "static_clusters": "cluster",
+    "dynamic_active_clusters": "cluster",
+    "static_route_configs": "route",
+    "dynamic_route_configs": "route",
+    "static_endpoint_configs": "endpoint",
+    "dynamic_endpoint_configs": "endpoint",
+}
+_WS = re.compile(r"[ \t\n\r]*")
+_DECODER = json.JSONDecoder()
+_VERSION_FILTER = r"(\.version|hot_restart_epoch)$"
+
+
+class _StreamReader:
+    # Pull parser over an iterator of byte/str chunks; whole values are decoded with json's
+    # C raw_decode, retried with more data when the buffer ends inside one.
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self.digest = hashlib.sha1()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def more(self, at_least=1):
+        """Append at least `at_least` chars to the buffer, False at the end of input."""
+        if self.eof:
+            return False
+        if self.pos > len(self.buf) // 2:
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+        pieces = []
+        got = 0
+        for chunk in self._chunks:
+            if isinstance(chunk, tuple):  # ("stdout"|"stderr", bytes) items of ExecStream
+                if chunk[0] != "stdout":
+                    continue
+                chunk = chunk[1]
+            if isinstance(chunk, str):
+                chunk = chunk.encode("utf-8")
+            self.digest.update(chunk)
+            pieces.append(self._decoder.decode(chunk))
+            got += len(pieces[-1])
+            if got >= at_least:
+                break
+        else:
+            self.eof = True
+            pieces.append(self._decoder.decode(b"", final=True))
+        self.buf += "".join(pieces)
+        return got > 0 or not self.eof
+
+    def peek(self):
+        """Next non blank char, "" at the end of input."""
+        while True:
+            self.pos = _WS.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.more():
+                return ""
+
+    def take(self, expected):
+        c = self.peek()
+        if c not in expected:
+            raise ValueError(f"config_dump: expected {expected!r} at char {self.pos}, got {c!r}")
+        self.pos += 1
+        return c
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                obj, end = _DECODER.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                # Cut mid value: read as much again as we already hold, linear on big values
+                if self.more(max(CHUNK_SIZE, len(self.buf) - self.pos)):
+                    continue
+                raise
+            if end == len(self.buf) and not self.eof and self.buf[self.pos] not in "{[\"":
+                self.more()  # a number/literal touching the end may go on in the next chunk
+                continue
+            self.pos = end
+            return obj
+
+    def members(self):
+        """Keys of the object at the cursor; the caller consumes each value."""
+        self.take("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self.take(":")
+            yield key
+            if self.take(",}") == "}":
+                return
+
+    def elements(self):
+        """One step per element of the array at the cursor; the caller consumes each value."""
+        self.take("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield
+            if self.take(",]") == "]":
+                return
+
+
+def _unwrap(kind, item):
+    if not isinstance(item, dict):
+        return None
+    if kind == "listener":
+        if "listener" in item:
+            return item["listener"]
+        state = item.get("active_state") or item.get("warming_state") or {}
+        return state.get("listener")
+    if kind == "cluster":
+        return item.get("cluster")
+    if kind == "route":
+        return item.get("route_config")
+    return item.get("endpoint_config")
+
+
+def _iter_reader(reader):
+    for key in reader.members():
+        if key != "configs" or reader.peek() != "[":
+            reader.value()
+            continue
+        for _ in reader.elements():
+            if reader.peek() != "{":
+                reader.value()
+                continue
+            for section_key in reader.members():
+                kind = _ITEM_ARRAYS.get(section_key)
+                if kind is None or reader.peek() != "[":
+                    reader.value()  # bootstrap, secrets, version_info ... decoded and dropped
+                    continue
+                for _ in reader.elements():
+                    resource = _unwrap(kind, reader.value())
+                    if resource:
+                        yield kind, resource
+
+
+def iter_config_dump(chunks):
+    """Chunks (bytes/str) of a /config_dump body -> (kind, resource dict), as they are read."""
+    yield from _iter_reader(_StreamReader(chunks))
+
+
+def _chunks_of(source):
+    if isinstance(source, (bytes, bytearray, memoryview, str)):
+        return [source]
+    if hasattr(source, "read"):
+        return iter(lambda: source.read(CHUNK_SIZE), source.read(0))
+    return source
+
+
+def resources_to_conf(resources):
+    """(kind, resource) pairs -> {"static_resources": {"listeners", "clusters"}} with RDS/EDS inlined."""
+    listeners, clusters, routes, endpoints = [], [], {}, {}
+    for kind, resource in resources:
+        if kind == "listener":
+            listeners.append(resource)
+        elif kind == "cluster":
+            clusters.append(resource)
+        elif kind == "route":
+            routes[resource.get("name", "")] = resource
+        elif kind == "endpoint":
+            endpoints[resource.get("cluster_name", "")] = resource
+
+    for listener in listeners:
+        for chain in listener.get("filter_chains", []):
+            for f in chain.get("filters", []):
+                typed_config = f.get("typed_config")
+                if not isinstance(typed_config, dict) or "route_config" in typed_config:
+                    continue
+                name = typed_config.get("rds", {}).get("route_config_name")
+                if name in routes:
+                    typed_config["route_config"] = routes[name]
+    for cluster in clusters:
+        if not cluster.get("load_assignment", {}).get("endpoints") and cluster.get("name") in endpoints:
+            cluster["load_assignment"] = endpoints[cluster["name"]]
+
+    return {"static_resources": {"listeners": listeners, "clusters": clusters}}
+
+
+@trace.traced("envoy.config_dump")
+def config_dump_to_conf(source):
+    return resources_to_conf(iter_config_dump(_chunks_of(source)))
+
+
+def config_dump_to_server_dicts(source, compact=False):
+    return envoy.conf_to_server_dicts(config_dump_to_conf(source), compact=compact)
+
+
+class EnvoyAdminClientV1:
+    def __init__(self, admin_url="http://127.0.0.1:9901", timeout=10, include_eds=True, probe=True,
+                 refresh_every=10, compact=False):
+        # INPUT
+        self.admin_url = admin_url.rstrip("/")
+        self.timeout = timeout
+        self.include_eds = include_eds
+        self.probe = probe
+        self.refresh_every = refresh_every
+        self.compact = compact
+
+        # DataStructures
+        self._servers = None
+        self._versions = None
+        self._etag = None
+        self._digest = None
+        self._skips = 0
+        self.changed = False
+        self.last_fetch = 0.0
+        self.counters = {"fetches": 0, "probe_skips": 0, "not_modified": 0, "same_hash": 0}
+
+    def server_dicts(self, force=False):
+        self.changed = False
+        if force or self._servers is None:
+            return self._fetch(self._probe_versions() if self.probe else None, force)
+
+        versions = self._probe_versions() if self.probe else None
+        if versions is not None and versions == self._versions and self._skips < self.refresh_every:
+            self._skips += 1
+            self.counters["probe_skips"] += 1
+            return self._servers
+        return self._fetch(versions, force)
+
+    def stats(self):
+        return dict(self.counters)
+
+    def _probe_versions(self):
+        import urllib.error, urllib.request  # http.client/email/ssl, only when talking to an admin port
+        url = f"{self.admin_url}/stats?filter={urllib.parse.quote(_VERSION_FILTER)}"
+        try:
+            with urllib.request.urlopen(url, timeout=self.timeout) as resp:
+                return resp.read()
+        except (OSError, urllib.error.URLError):
+            return None  # no probe, the dump fetch decides
+
+    def _fetch(self, versions, force):
+        import urllib.error, urllib.request
+        url = f"{self.admin_url}/config_dump" + ("?include_eds" if self.include_eds else "")
+        request = urllib.request.Request(url)
+        if self._etag and not force and self._servers is not None:
+            request.add_header("If-None-Match", self._etag)
+
+        self.counters["fetches"] += 1
+        self._skips = 0
+        try:
+            resp = urllib.request.urlopen(request, timeout=self.timeout)
+        except urllib.error.HTTPError as e:
+            if e.code == 304 and self._servers is not None:
+                self.counters["not_modified"] += 1
+                self._versions = versions
+                return self._servers
+            raise
+        with resp, trace.span("envoy.config_dump", url=url):
+            reader = _StreamReader(iter(lambda: resp.read(CHUNK_SIZE), b""))
+            conf = resources_to_conf(_iter_reader(reader))
+            while reader.more(CHUNK_SIZE):
+                pass  # trailing bytes still count for the hash
+            self._etag = resp.headers.get("ETag")
+
+        self._versions = versions
+        self.last_fetch = time.time()
+        digest = reader.digest.digest()
+        if digest == self._digest and self._servers is not None:
+            self.counters["same_hash"] += 1
+            return self._servers
+        self._digest = digest
+        self._servers = envoy.conf_to_server_dicts(conf, compact=self.compact)
+        self.changed = True
+        return self._servers
@@ -0,0 +1,156 @@
+import json
+import shlex
+from datetime import datetime
+
+from DogeOpsPy.ingress import envoy
+
+# =============================================================================
+# EnvoyContainerCacheV1 — envoy config paths of every container on a host, cached (user guide)
+# =============================================================================
+# One `docker inspect` per container is one round trip + one json.loads each. Here:
+#   1) list_cmd: `docker ps` ids + creation times of running containers, no inspect at all
+#   2) one `docker inspect id1 id2 ...` for the containers not seen before
+#   3) every container of that inspect parsed in one json.loads
+# A container is known by (id, creation time): the config path comes from its command line,
+# fixed when the container is created, a restart keeps it, a recreate gets a new id.
+# `docker ps` only knows creation (not start) time, so both the listing and inspect / socket
+# list JSON are keyed on that, as epoch seconds. Steady state is step 1 only.
+#
+# -----------------------------------------------------------------------------
+# Init Options:
+#   docker.     # docker binary / prefix, e.g. "sudo docker"
+#
+# -----------------------------------------------------------------------------
+# Methods:
+# instance.discover(conn)              # -> {container_id: config_path} of the Envoy containers
+# instance.stale(listing)              # ids to (re)inspect, listing: list_cmd output or [(id, created)]
+# instance.update(inspect_json)        # feed a multi-container `docker inspect` / socket list JSON
+# instance.config_paths(ids=None)      # cached {container_id: config_path}, envoy only
+# instance.forget(ids)
+#
+# -----------------------------------------------------------------------------
+# QuickStart:
+# cache = EnvoyContainerCacheV1(docker="sudo docker")
+# with DirectSSH(host, user, key_path=key) as conn:
+#     for container_id, path in cache.discover(conn).items():
+#         conf = conn.read_file(path)
+#
+# -----------------------------------------------------------------------------
+# NOTES:
+# 1) conn is anything with exec_rc(command) -> (rc, out, err) (DirectSSH) or
+#    exec_many([command]) -> [(rc, out)] (BastionJumpSSH).
+# 2) Paths are the ones on the container command line, i.e. inside the container.
+
+LIST_FORMAT = "{{.ID}} {{.CreatedAt}}"
+
+
+def created_epoch(value):
+    """Creation time as `docker ps` CreatedAt, inspect Created or socket list Created -> epoch seconds str."""
+    if isinstance(value, (int, float)):
+        return str(int(value))
+    value = str(value or "").strip()
+    if not value or value.isdigit():
+        return value
+    try:
+        if value[10:11] == "T":  # inspect: 2024-05-01T10:00:00.123456789Z / ...+02:00
+            zone = value[19:].lstrip("0123456789.")
+            created = datetime.fromisoformat(value[:19] + ("+00:00" if zone in ("", "Z") else zone))
+        else:  # docker ps: 2024-05-01 10:00:00 +0000 UTC
+            date, clock, offset = value.split()[:3]
+            created = datetime.strptime(f"{date} {clock} {offset}", "%Y-%m-%d %H:%M:%S %z")
+    except ValueError:
+        return value
+    return str(int(created.timestamp()))
+
+
+def parse_listing(listing):
+    """list_cmd output -> [(id, created), ...]"""
+    pairs = []
+    for line in listing.splitlines():
+        parts = line.split(None, 1)
+        if parts:
+            pairs.append((parts[0], created_epoch(parts[1]) if len(parts) > 1 else ""))
+    return pairs
+
+
+class _Container:
+    __slots__ = ("created", "envoy", "config_path")
+
+    def __init__(self, created, is_envoy, config_path):
+        self.created = created
+        self.envoy = is_envoy
+        self.config_path = config_path
+
+
+class EnvoyContainerCacheV1:
+    def __init__(self, docker="docker"):
+        # INPUT
+        self.docker = docker
+
+        # DataStructures
+        self._containers = {}  # id -> _Container
+        self.inspected = 0  # containers inspected so far
+
+    @property
+    def list_cmd(self):
+        return f"{self.docker} ps --no-trunc --format '{LIST_FORMAT}'"
+
+    def inspect_cmd(self, ids):
+        return f"{self.docker} inspect " + " ".join(shlex.quote(i) for i in ids)
+
+    def stale(self, listing):
+        if isinstance(listing, str):
+            listing = parse_listing(listing)
+        stale = []
+        for container_id, created in listing:
+            known = self._containers.get(container_id)
+            if known is None or (created and known.created != created_epoch(created)):
+                stale.append(container_id)
+        return stale
+
+    def update(self, inspect_json):
+        containers = json.loads(inspect_json) if isinstance(inspect_json, (str, bytes, bytearray)) else inspect_json
+        if not isinstance(containers, list):
+            raise ValueError("update() takes a docker inspect / containers list JSON array")
+        envoy_paths = envoy.docker_inspect_to_envoy_config_paths(containers)
+        for container in containers:
+            if not isinstance(container, dict) or not container.get("Id"):
+                continue
+            container_id = container["Id"]
+            self._containers[container_id] = _Container(
+                created_epoch(container.get("Created")), container_id in envoy_paths, envoy_paths.get(container_id, ""))
+            self.inspected += 1
+
+    def config_paths(self, ids=None):
+        ids = self._containers.keys() if ids is None else ids
+        paths = {}
+        for container_id in ids:
+            known = self._containers.get(container_id)
+            if known is not None and known.envoy:
+                paths[container_id] = known.config_path
+        return paths
+
+    def forget(self, ids):
+        for container_id in ids:
+            self._containers.pop(container_id, None)
+
+    def discover(self, conn):
+        listing = parse_listing(self._run(conn, self.list_cmd))
+        ids = [container_id for container_id, _ in listing]
+        self.forget(set(self._containers) - set(ids))  # gone containers
+
+        stale = self.stale(listing)
+        if stale:
+            self.update(self._run(conn, self.inspect_cmd(stale)))
+        return self.config_paths(ids)
+
+    @staticmethod
+    def _run(conn, command):
+        if hasattr(conn, "exec_rc"):
+            rc, out, err = conn.exec_rc(command)
+        else:
+            rc, out = conn.exec_many([command])[0]
+            err = out
+        if rc != 0:
+            raise RuntimeError(f"`{command}` failed rc={rc}: {err.strip()[:200]}")
+        return out
@@ -0,0 +1,190 @@
+import hashlib
+import json
+import re
+from collections import OrderedDict
+
+from DogeOpsPy.ingress import envoy
+from DogeOpsPy.profiling import trace
+
+# =============================================================================
+# envoy_loader — raw envoy yaml/json -> server dicts, fast (user guide)
+# =============================================================================
+# envoy.conf_to_server_dicts() only reads static_resources.listeners and .clusters, but
+# yaml.safe_load() of the whole file (admin, stats, runtime, tracing ...) is where the time
+# goes. Here:
+#   JSON    -> json.loads(), in C
+#   YAML    -> only the listeners/clusters children of the top level static_resources are
+#              cut out of the text and loaded, with yaml's C loader when it is built in
+#   anything the cutter doesn't understand (flow style, multi documents, aliases to
+#   anchors outside the cut ...) falls back to a full load, same result, just slower.
+# EnvoyConfigCacheV1 keys results by a hash of the raw bytes: an unchanged config is a
+# hash + dict get.
+#
+# -----------------------------------------------------------------------------
+# Functions:
+# load_conf(raw)              # -> {"static_resources": {"listeners": [...], "clusters": [...]}}
+# raw_to_server_dicts(raw)    # -> envoy.conf_to_server_dicts() of it
+#
+# EnvoyConfigCacheV1(max_entries=1024)
+# instance.server_dicts(raw)  # cached raw_to_server_dicts()
+# instance.clusters(raw)      # cached envoy.conf_to_clusters()
+# instance.stats()            # {"hits":..., "misses":..., "size":...}
+#
+# -----------------------------------------------------------------------------
+# QuickStart:
+# cache = EnvoyConfigCacheV1()
+# while True:
+#     for host, conn in conns.items():
+#         servers = cache.server_dicts(conn.read_file("/etc/envoy/envoy.yaml"))
+#     time.sleep(60)
+#
+# -----------------------------------------------------------------------------
+# NOTES:
+# 1) raw is str or bytes; bytes are hashed as they are, no decode on a cache hit.
+# 2) Cached lists/dicts are shared, treat them as read-only (copy before editing).
+# 3) On the cut path, a syntax error in a section that is never loaded (admin, stats ...)
+#    goes unnoticed; `envoy --mode validate` is the place to catch those.
+
+SECTIONS = ("listeners", "clusters")
+
+# A key of a block mapping at a given indent, "key:" followed by a space, a comment or EOL
+_TOP_KEY = re.compile(r"^(?![\s#\-%]|\.\.\.|---)(\"[^\"\n]*\"|'[^'\n]*'|[^\s:#][^:\n]*?)[ \t]*:(?=[ \t]|$)", re.M)
+_DOC_MARK = re.compile(r"^(?:---|\.\.\.)(?=\s|$)", re.M)
+_ANCHOR = re.compile(r"(?<![\w\"'])&([^\s,\[\]{}]+)")
+_ALIAS = re.compile(r"(?<![\w\"'])\*([^\s,\[\]{}]+)")
+
+
+def _yaml_loader():
+    import yaml
+    return yaml, getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+def _keys_at(text, indent):
+    """[(key, start)] of the keys at exactly `indent` spaces."""
+    if indent == 0:
+        pattern = _TOP_KEY
+    else:
+        pattern = re.compile(r"^ {%d}(?=\S)" % indent + _TOP_KEY.pattern[1:], re.M)
+    return [(m.group(1).strip("\"'"), m.start()) for m in pattern.finditer(text)]
+
+
+def _sections(text, keys):
+    """[(key, start), ...] -> {key: text slice up to the next key}."""
+    bounds = [start for _, start in keys[1:]] + [len(text)]
+    return {key: text[start:end] for (key, start), end in zip(keys, bounds)}
+
+
+def _cut_static(text):
+    """Yaml text holding only static_resources.{listeners,clusters}, None if unsure."""
+    if _DOC_MARK.search(text, 1 if text.startswith("---") else 0):
+        return None  # several documents, or a header somewhere we don't expect it
+    top = _sections(text, _keys_at(text, 0))
+    static = top.get("static_resources")
+    if static is None:
+        return None  # nothing to cut, let the full load decide what this is
+    header, _, body = static.partition("\n")
+    if header.split(":", 1)[1].split("#", 1)[0].strip():
+        return None  # flow style or an inline value
+    indent = 0
+    for line in body.splitlines():
+        if line.strip() and not line.lstrip().startswith("#"):
+            indent = len(line) - len(line.lstrip(" "))
+            break
+    if not indent:
+        return None
+
+    children = _sections(body, _keys_at(body, indent))
+    kept = "".join(children[key].rstrip("\n") + "\n" for key in SECTIONS if key in children)
+    aliases = set(_ALIAS.findall(kept))
+    if not aliases <= set(_ANCHOR.findall(kept)):
+        return None  # alias to an anchor that was cut away
+    return "static_resources:\n" + kept
+
+
+def _select(conf):
+    static = conf.get("static_resources") if isinstance(conf, dict) else None
+    if not isinstance(static, dict):
+        static = {}
+    return {"static_resources": {key: static.get(key) or [] for key in SECTIONS}}
+
+
+@trace.traced("envoy.load")
+def load_conf(raw):
+    """Raw envoy yaml/json (str or bytes) -> dict with only the sections conf_to_server_dicts() reads."""
+    if isinstance(raw, (bytes, bytearray, memoryview)):
+        raw = bytes(raw).decode("utf-8", errors="replace")
+    text = raw.lstrip("\ufeff")
+    if text.lstrip().startswith("{"):
+        try:
+            return _select(json.loads(text))
+        except ValueError:
+            pass  # yaml flow mapping, not json
+
+    yaml, Loader = _yaml_loader()
+    cut = _cut_static(text)
+    if cut is not None:
+        try:
+            return _select(yaml.load(cut, Loader=Loader))
+        except yaml.YAMLError:
+            pass  # let the full load report the real error
+    return _select(yaml.load(text, Loader=Loader))
+
+
+def raw_to_server_dicts(raw, compact=False):
+    return envoy.conf_to_server_dicts(load_conf(raw), compact=compact)
+
+
+class _ConfEntry:
+    __slots__ = ("conf", "servers", "clusters")
+
+    def __init__(self, conf):
+        self.conf = conf
+        self.servers = None
+        self.clusters = None
+
+
+class EnvoyConfigCacheV1:
+    def __init__(self, max_entries=1024):
+        # INPUT
+        self.max_entries = max_entries
+
+        # DataStructures
+        self._entries = OrderedDict()  # sha1 of raw bytes -> _ConfEntry, LRU order
+        self.hits = 0
+        self.misses = 0
+
+    def load_conf(self, raw):
+        return self._entry(raw).conf
+
+    def server_dicts(self, raw):
+        entry = self._entry(raw)
+        if entry.servers is None:
+            entry.servers = envoy.conf_to_server_dicts(entry.conf)
+        return entry.servers
+
+    def clusters(self, raw):
+        entry = self._entry(raw)
+        if entry.clusters is None:
+            entry.clusters = envoy.conf_to_clusters(entry.conf)
+        return entry.clusters
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+    def clear(self):
+        self._entries.clear()
+
+    def _entry(self, raw):
+        data = raw.encode("utf-8", errors="replace") if isinstance(raw, str) else bytes(raw)
+        key = hashlib.sha1(data).digest()
+        entry = self._entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry
+        self.misses += 1
+        entry = _ConfEntry(load_conf(data))
+        self._entries[key] = entry
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry
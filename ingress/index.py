@@ -0,0 +1,197 @@
+from collections import defaultdict
+
+# =============================================================================
+# InventoryIndexV1 — reverse index over nginx/envoy server dicts of a fleet (user guide)
+# =============================================================================
+# "Which listeners on which hosts route to 10.0.3.7:8080?" without scanning every record.
+# Every listener (one server dict of nginx/envoy conf_to_server_dicts()) is filed under:
+#   backend    # each proxy target, normalized ("http://10.0.3.7:8080/x" -> "10.0.3.7:8080")
+#   upstream   # upstream / cluster names whose every server is in its proxy list
+#   cert       # each path of its "ssl" field
+#   port       # each listen port
+# Lookups are one dict get + a set, whatever the fleet size. A host is re-indexed or
+# dropped on its own, the rest of the index is not touched.
+#
+# -----------------------------------------------------------------------------
+# Methods:
+# instance.update(host, server_dicts, upstreams=None)   # (re)index one host
+# instance.remove(host)
+# instance.by_backend("10.0.3.7:8080")                   # [(host, server_dict), ...]
+# instance.by_upstream("api_backend")                    # same, optional host=
+# instance.by_cert("/etc/ssl/api.pem")
+# instance.by_port(443)
+# instance.lookup(kind, key)                             # [(host, listener_no), ...], no dicts
+# instance.keys(kind)                                    # every indexed key of that kind
+#
+# -----------------------------------------------------------------------------
+# QuickStart:
+# index = InventoryIndexV1()
+# index.update("edge-1", nginx.T_to_server_dicts(t1), nginx.conf_to_upstream_dict(lines1))
+# index.update("mesh-1", envoy.conf_to_server_dicts(conf), envoy.conf_to_clusters(conf))
+# for host, server in index.by_backend("10.0.3.7:8080"):
+#     print(host, list(server["listen"]), server["l7"])
+#
+# -----------------------------------------------------------------------------
+# NOTES:
+# 1) server dicts only keep resolved addresses, so upstream/cluster names need the
+#    `upstreams` table ({name: [servers]}) of the same host: a listener is filed under a
+#    name when every server of it is in its proxy list. A proxy target that never
+#    resolved (left as a bare name) is indexed as an upstream too.
+# 2) Indexed dicts are kept by reference, don't edit them in place: update() the host instead.
+
+KINDS = ("backend", "upstream", "cert", "port")
+
+
+def normalize_backend(target):
+    """ "http://API.local:8080/path" -> "api.local:8080"; unix sockets are kept as is."""
+    target = str(target).strip()
+    if target.startswith("unix:"):
+        return target
+    if "://" in target:
+        target = target.split("://", 1)[1]
+    return target.split("/", 1)[0].lower()
+
+
+def listen_port(listen_key):
+    """nginx/envoy listen key -> port int; address only ("127.0.0.1", "[::1]") is nginx's 80, unix sockets -1."""
+    listen_key = str(listen_key)
+    if listen_key.isdigit():
+        return int(listen_key)
+    if listen_key.startswith("unix:"):
+        return -1
+    if listen_key.startswith("["):
+        # "[::1]:8080" / "[::1]": the colons inside the brackets are the address
+        rest = listen_key.partition("]")[2]
+        port = rest[1:] if rest.startswith(":") else ""
+    else:
+        port = listen_key.rpartition(":")[2] if ":" in listen_key else ""
+    return int(port) if port.isdigit() else 80
+
+
+def upstream_table(upstreams):
+    """{name: [servers]} -> (name -> {backends}, backend -> [names]), built once per host."""
+    members = {}
+    owners = defaultdict(list)
+    for name, servers in (upstreams or {}).items():
+        members[name] = {normalize_backend(s) for s in servers}
+        for backend in members[name]:
+            owners[backend].append(name)
+    return members, owners
+
+
+def listener_keys(server, table=None):
+    """(kind, key) pairs one server dict is filed under; `table` from upstream_table()."""
+    members, owners = table or ({}, {})
+    keys = set()
+    backends = set()
+    for target in server.get("proxy", ()):
+        backend = normalize_backend(target)
+        backends.add(backend)
+        keys.add(("backend", backend))
+        if ":" not in backend and not backend.startswith("unix:"):
+            # Name the parser couldn't resolve: "name" (envoy, case kept) or "http://name" (nginx)
+            keys.add(("upstream", backend if "://" in str(target) else str(target).strip()))
+    for path in server.get("ssl", "").split(";"):
+        if path:
+            keys.add(("cert", path))
+    for listen in server.get("listen", {}):
+        port = listen_port(listen)
+        if port >= 0:
+            keys.add(("port", port))
+
+    candidates = {name for backend in backends for name in owners.get(backend, ())}
+    for name in candidates:
+        if members[name] <= backends:
+            keys.add(("upstream", name))
+    return keys
+
+
+class InventoryIndexV1:
+    def __init__(self):
+        # DataStructures
+        self._tables = {kind: defaultdict(set) for kind in KINDS}  # kind -> key -> {(host, listener_no)}
+        self._servers = {}  # host -> [server_dict, ...]
+        self._host_keys = {}  # host -> [(kind, key, listener_no), ...], to undo an update
+
+    # ===== build =====
+    def update(self, host, server_dicts, upstreams=None):
+        self.remove(host)
+        server_dicts = list(server_dicts)
+        table = upstream_table(upstreams)
+        host_keys = []
+        for listener_no, server in enumerate(server_dicts):
+            ref = (host, listener_no)
+            for kind, key in listener_keys(server, table):
+                self._tables[kind][key].add(ref)
+                host_keys.append((kind, key, listener_no))
+        self._servers[host] = server_dicts
+        self._host_keys[host] = host_keys
+
+    def remove(self, host):
+        host_keys = self._host_keys.pop(host, None)
+        self._servers.pop(host, None)
+        if not host_keys:
+            return
+        for kind, key, listener_no in host_keys:
+            table = self._tables[kind]
+            refs = table.get(key)
+            if refs is None:
+                continue
+            refs.discard((host, listener_no))
+            if not refs:
+                del table[key]
+
+    def clear(self):
+        for table in self._tables.values():
+            table.clear()
+        self._servers.clear()
+        self._host_keys.clear()
+
+    # ===== query =====
+    def lookup(self, kind, key):
+        if kind not in self._tables:
+            raise ValueError(f"Unknown index kind {kind!r}, use one of {KINDS}")
+        if kind == "backend":
+            key = normalize_backend(key)
+        elif kind == "port":
+            key = int(key)
+        return list(self._tables[kind].get(key, ()))
+
+    def by_backend(self, address):
+        return self._resolve(self.lookup("backend", address))
+
+    def by_upstream(self, name, host=None):
+        refs = self.lookup("upstream", name)
+        if host is not None:
+            refs = [ref for ref in refs if ref[0] == host]
+        return self._resolve(refs)
+
+    def by_cert(self, path):
+        return self._resolve(self.lookup("cert", path))
+
+    def by_port(self, port):
+        return self._resolve(self.lookup("port", port))
+
+    def keys(self, kind):
+        return list(self._tables[kind])
+
+    def hosts(self):
+        return list(self._servers)
+
+    def servers(self, host):
+        return self._servers.get(host, [])
+
+    def stats(self):
+        stats = {kind: len(table) for kind, table in self._tables.items()}
+        stats["hosts"] = len(self._servers)
+        stats["listeners"] = sum(len(servers) for servers in self._servers.values())
+        return stats
+
+    def __len__(self):
+        return sum(len(servers) for servers in self._servers.values())
+
+    def __contains__(self, host):
+        return host in self._servers
+
+    def _resolve(self, refs):
+        return [(host, self._servers[host][listener_no]) for host, listener_no in sorted(refs)]
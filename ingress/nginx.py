@@ -1,15 +1,15 @@
 import re
 
+from DogeOpsPy.ingress.nginx_tree import parse_conf, parse_T, upstreams_from_tree, server_dicts_from_tree
+from DogeOpsPy.ingress.record import to_records
+
+# Longest prefix made of non-comment chars and quoted spans, what follows it (if anything) is a comment
+_UNCOMMENTED_PREFIX = re.compile(r"""(?:[^'"#]+|'[^']*'?|"[^"]*"?)*""")
+_TEST_RESULT_LINE = re.compile(r'nginx: configuration file \S+ test (?:failed|is successful)')
+_SERVER_OPEN = re.compile(r'\bserver\s*\{')
+
 def escape_comments(line):
-    in_single = in_double = False
-    for i, char in enumerate(line):
-        if char == "'" and not in_double:
-            in_single = not in_single
-        elif char == '"' and not in_single:
-            in_double = not in_double
-        elif char == '#' and not in_single and not in_double:
-            return line[:i].rstrip()
-    return line.rstrip()
+    return line[:_UNCOMMENTED_PREFIX.match(line).end()].rstrip()
 
 # THIS IS PARSING NGINX -T WITH LOTS OF GARBAGE
 def T_to_conf(T_result):
@@ -19,11 +19,7 @@ def T_to_conf(T_result):
 
     if proper_T_magic_word in T_result:
         T_result = T_result.split(proper_T_magic_word, 1)[1]  # Trash everything before magic word.
-        T_result = re.sub(
-            r'nginx: configuration file \S+ test (?:failed|is successful)',
-            '',
-            T_result
-        )
+        T_result = _TEST_RESULT_LINE.sub('', T_result)
         for line in T_result.split("\n"):
             uncommented = escape_comments(line)
             if uncommented.strip() == "" and prev_line.strip() == "":
@@ -34,77 +30,21 @@ def T_to_conf(T_result):
     return result_lines
 
 def conf_to_upstream_dict(conf_lines):
-    # 压扁，用正则处理, 输入绝对不可以有注释！
-    conf_text = " ".join(conf_lines).replace("\n", " ")
-
-    # upstream 空格+ （非空格）空格* 「 （里面裹的一切）」
-    upstream_blocks = re.findall(r"upstream\s+(\S+)\s*\{(.*?)\}", conf_text)
-
-    upstreams = {}
-    for name, block_body in upstream_blocks:
-        # server 空格+ （累计所有字符直到发现空格或;）
-        # server abc.com:30000;
-        # server 1.1.1.1:3000 weight=2 max_fails=3 fail_timeout=30s;
-        servers = re.findall(r"server\s+([^\s;]+)", block_body)
-        upstreams[name] = servers
-
-    return upstreams
-
-
-def conf_to_server_dicts(conf_lines):
-    upstreams_dict = conf_to_upstream_dict(conf_lines)
-    server_blocks = conf_to_server_block_lines(conf_lines)
-    result = []
-
-    for block_lines in server_blocks:
-        server_data = {
-            "listen": {},
-            "ssl": "",
-            "proxy_protocol": False,
-            "proxy": [],
-            "l7": []
-        }
-
-        block_text = " ".join(block_lines)
-
-        # === LISTEN ===
-        for match in re.finditer(r"listen\s+([^\s;]+)([^;]*);", block_text):
-            listen_target = match.group(1).strip()
-            flags = match.group(2).strip()
-            server_data["listen"][listen_target] = flags
-
-        server_data["listen"] = dict(sorted(server_data["listen"].items()))
-
-        # === SSL ===
-        cert = re.search(r"ssl_certificate\s+([^\s;]+);", block_text)
-        key = re.search(r"ssl_certificate_key\s+([^\s;]+);", block_text)
-        ssl_params = []
-        if cert:
-            ssl_params.append(cert.group(1))
-        if key:
-            ssl_params.append(key.group(1))
-        server_data["ssl"] = ";".join(ssl_params)
-
-        # === PROXY_PROTOCOL ===
-        if re.search(r"\bproxy_protocol\s+on;", block_text):
-            server_data["proxy_protocol"] = True
-
-        # === PROXY_PASS ===
-        for match in re.finditer(r"proxy_pass\s+(.*?);", block_text):
-            target = match.group(1).strip().strip('"').strip("'")
-            lookup_key = target.lower() if "://" not in target and not target.startswith("unix:") else target
-            if lookup_key in upstreams_dict:
-                server_data["proxy"].extend(upstreams_dict[lookup_key])
-            else:
-                server_data["proxy"].append(target)
-
-        # === L7 location paths ===
-        for match in re.finditer(r"location\s+([^{\s]+)", block_text):
-            server_data["l7"].append(match.group(1).strip())
-
-        result.append(server_data)
-
-    return result
+    # 输入可以带注释，tokenizer 自己认得引号和注释
+    return upstreams_from_tree(parse_conf("\n".join(conf_lines)))
+
+
+def conf_to_server_dicts(conf_lines, compact=False):
+    # Single pass: tokenize -> block tree -> walk each server block once
+    # compact=True: interned ServerRecord (read-only Mapping) instead of dicts, see ingress.record
+    servers = server_dicts_from_tree(parse_conf("\n".join(conf_lines)))
+    return to_records(servers) if compact else servers
+
+
+def T_to_server_dicts(T_result, compact=False):
+    # Raw `nginx -T` straight to server dicts, no T_to_conf() line copies in between
+    servers = server_dicts_from_tree(parse_T(T_result))
+    return to_records(servers) if compact else servers
 
 
 def conf_to_server_block_lines(conf_lines):
@@ -120,7 +60,7 @@ def conf_to_server_block_lines(conf_lines):
             continue
 
         # Search for 'server {', allowing arbitrary spacing
-        match = re.search(r'\bserver\s*\{', line)
+        match = _SERVER_OPEN.search(line)
         if match:
             # Start of new server block
             inside_block = True
@@ -0,0 +1,127 @@
+import hashlib
+import re
+from collections import OrderedDict
+
+from DogeOpsPy.ingress.nginx_tree import gc_paused, parse_conf, server_dict_from_block, strip_T, upstreams_from_tree
+
+# =============================================================================
+# NginxParseCacheV1 — per-file incremental reparse of `nginx -T` snapshots (user guide)
+# =============================================================================
+# `nginx -T` prints every config file under a "# configuration file <path>:" header.
+# Each section is content-hashed; a section seen before is not parsed again, its parsed
+# blocks come from an LRU cache. Server dicts are cached too, and only rebuilt when the
+# file changed or the upstream table they resolve against changed.
+# Steady state (nothing changed since last poll) costs one hash pass over the dump.
+#
+# -----------------------------------------------------------------------------
+# Init Options:
+#   max_files.   # LRU size, in file sections (shared by every host fed to this cache)
+#
+# -----------------------------------------------------------------------------
+# Methods:
+# instance.T_to_server_dicts(T_result)   # same result as nginx.T_to_server_dicts()
+# instance.T_to_upstream_dict(T_result)  # same result as nginx.conf_to_upstream_dict()
+# instance.last_parsed                   # paths actually reparsed by the last call
+# instance.stats()                       # {"hits":..., "misses":..., "size":...}
+#
+# -----------------------------------------------------------------------------
+# QuickStart:
+# cache = NginxParseCacheV1(max_files=20000)
+# while True:
+#     for host in hosts:
+#         servers = cache.T_to_server_dicts(fetch_T(host))
+#     time.sleep(60)
+#
+# -----------------------------------------------------------------------------
+# NOTES:
+# 1) Returned dicts are shared with the cache, treat them as read-only (copy before editing).
+# 2) One cache can serve a whole fleet: identical files on different hosts share one entry.
+
+_SECTION_HEADER = re.compile(r"^# configuration file (\S+?):[ \t]*$", re.M)
+
+
+class _FileEntry:
+    __slots__ = ("servers", "upstreams", "dicts_key", "dicts")
+
+    def __init__(self, servers, upstreams):
+        self.servers = servers  # server Directive blocks of this file
+        self.upstreams = upstreams  # {name: [servers]} defined in this file
+        self.dicts_key = None  # upstream table fingerprint the cached dicts were built against
+        self.dicts = None
+
+
+def split_T_sections(T_result):
+    """Raw `nginx -T` -> [(path, text), ...]; text before the first header gets path ""."""
+    text = strip_T(T_result)
+    sections = []
+    path, start = "", 0
+    for header in _SECTION_HEADER.finditer(text):
+        if header.start() > start or path:
+            sections.append((path, text[start:header.start()]))
+        path, start = header.group(1), header.end()
+    if start < len(text) or path:
+        sections.append((path, text[start:]))
+    return sections
+
+
+class NginxParseCacheV1:
+    def __init__(self, max_files=4096):
+        # INPUT
+        self.max_files = max_files
+
+        # DataStructures
+        self._entries = OrderedDict()  # (path, digest) -> _FileEntry, LRU order
+        self.hits = 0
+        self.misses = 0
+        self.last_parsed = []
+
+    def T_to_server_dicts(self, T_result):
+        entries = self._entries_for(T_result)
+        upstreams = {}
+        upstream_key = []
+        for key, entry in entries:
+            if entry.upstreams:
+                upstreams.update(entry.upstreams)
+                upstream_key.append(key)
+        upstream_key = tuple(upstream_key)
+
+        result = []
+        with gc_paused():
+            for key, entry in entries:
+                if entry.dicts_key != upstream_key:
+                    entry.dicts = [server_dict_from_block(block, upstreams) for block in entry.servers]
+                    entry.dicts_key = upstream_key
+                result.extend(entry.dicts)
+        return result
+
+    def T_to_upstream_dict(self, T_result):
+        upstreams = {}
+        for key, entry in self._entries_for(T_result):
+            upstreams.update(entry.upstreams)
+        return upstreams
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+    def clear(self):
+        self._entries.clear()
+
+    def _entries_for(self, T_result):
+        entries = []
+        self.last_parsed = []
+        for path, text in split_T_sections(T_result):
+            key = (path, hashlib.sha1(text.encode("utf-8", errors="replace")).digest())
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                root = parse_conf(text, file=path)
+                entry = _FileEntry(root.find_blocks("server"), upstreams_from_tree(root))
+                self._entries[key] = entry
+                self.last_parsed.append(path)
+                while len(self._entries) > self.max_files:
+                    self._entries.popitem(last=False)
+            else:
+                self.hits += 1
+                self._entries.move_to_end(key)
+            entries.append((key, entry))
+        return entries
@@ -0,0 +1,199 @@
+import codecs
+
+from DogeOpsPy.ingress.nginx_tree import (
+    Directive, T_FILE_HEADER, T_MAGIC_WORD, T_TEST_LINE, gc_paused, server_dict_from_block, split_statements,
+    split_words
+)
+
+# =============================================================================
+# NginxStreamParserV1 — incremental `nginx -T` / nginx.conf ingestion (user guide)
+# =============================================================================
+# Feed text (or bytes) as it arrives, get records back as soon as their block closes.
+# Only the server/upstream block being read is kept as a tree, everything around it
+# (http {}, events {}, map {} ...) is dropped on the fly, so memory stays at
+# "one block + the upstream table", not "the whole dump, several times".
+#
+# Records:
+#   ("upstream", {"name": ..., "servers": [...], "file": ...})
+#   ("server",   <same dict as nginx.conf_to_server_dicts()>)
+#
+# -----------------------------------------------------------------------------
+# Init Options:
+#   T.        # True: input is raw `nginx -T`, skip everything up to "syntax is ok"
+#   lines.    # True: items are lines without "\n" (InteractiveProcV1 logs), add it back
+#   batch.    # Parse once this many chars are buffered; small = lower latency, big = less overhead
+#
+# -----------------------------------------------------------------------------
+# Methods:
+# instance.feed(text_or_bytes)   # -> list of records completed by this piece
+# instance.close()               # -> remaining records, call once at the end
+#
+# -----------------------------------------------------------------------------
+# QuickStart:
+# for kind, record in iter_records(open("nginx_T.txt")):
+#     ...
+#
+# stream = ssh_conn.iter_exec("sudo nginx -T 2>&1")
+# for kind, record in iter_records(chunk for name, chunk in stream):
+#     ...
+#
+# async for kind, record in aiter_records(async_line_source, lines=True):
+#     ...
+#
+# -----------------------------------------------------------------------------
+# NOTES:
+# 1) A server whose `proxy_pass <name>` names an upstream that hasn't been seen yet is
+#    held back and emitted by close(), once every upstream is known. Everything else is
+#    emitted in document order.
+# 2) Same parsing rules as nginx_tree.parse_T(): a file header closes blocks the previous
+#    file left open, stray "}" are dropped.
+
+KEPT_BLOCKS = ("server", "upstream")
+
+
+class NginxStreamParserV1:
+    def __init__(self, T=True, lines=False, batch=65536):
+        # INPUT
+        self.lines = lines
+        self.batch = batch
+
+        # DataStructures
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._buffer = ""
+        self._waiting_magic = T
+        self._T = T
+        self._file = ""
+        self._stack = []  # open blocks, Directive nodes; only kept ones collect children
+        self._kept_depth = -1  # index in _stack of the server/upstream block being kept, -1 if none
+        self._words = []
+        self._upstreams = {}
+        self._held = []  # server blocks waiting for an upstream defined later
+        self._closed = False
+
+    # ===== public =====
+    def feed(self, piece):
+        if isinstance(piece, (bytes, bytearray, memoryview)):
+            piece = self._decoder.decode(bytes(piece))
+        if self.lines:
+            piece += "\n"
+        self._buffer += piece
+        if len(self._buffer) < self.batch:
+            return []
+        cut = self._buffer.rfind("\n")
+        if cut < 0:
+            return []
+        text, self._buffer = self._buffer[:cut + 1], self._buffer[cut + 1:]
+        return self._consume(text, final=False)
+
+    def close(self):
+        if self._closed:
+            return []
+        self._closed = True
+        text = self._buffer + self._decoder.decode(b"", final=True)
+        self._buffer = ""
+        records = self._consume(text + "\n", final=True)
+        while self._stack:
+            records.extend(self._close_block())
+        for block in self._held:
+            records.append(("server", server_dict_from_block(block, self._upstreams)))
+        self._held = []
+        return records
+
+    # ===== internals =====
+    def _consume(self, text, final):
+        if self._waiting_magic:
+            if T_MAGIC_WORD not in text:
+                return []
+            text = text.split(T_MAGIC_WORD, 1)[1]
+            self._waiting_magic = False
+        if self._T:
+            text = T_TEST_LINE.sub("", text)
+
+        statements = split_statements(text)
+        if statements and statements[-1][1] == "" and not final:
+            # Statement still open at the end of this piece, hand its text back to the buffer
+            self._buffer = statements.pop()[0] + self._buffer
+
+        records = []
+        with gc_paused():
+            for body, term in statements:
+                self._statement(body, term, records)
+        return records
+
+    def _statement(self, body, term, records):
+        words = self._words
+        if body and not body.isspace():
+            if '"' in body or "'" in body or "\\" in body:
+                words.extend(split_words(body))
+            else:
+                words.extend(body.split())
+        t = term[:1]
+        if t == ";":
+            if words and self._kept_depth >= 0:
+                self._stack[-1].children.append(Directive(words[0], words[1:], None, self._file))
+            self._words = []
+        elif t == "{":
+            block = Directive(words[0] if words else "", words[1:], [], self._file)
+            if self._kept_depth >= 0:
+                self._stack[-1].children.append(block)
+            elif block.name in KEPT_BLOCKS:
+                self._kept_depth = len(self._stack)
+            self._stack.append(block)
+            self._words = []
+        elif t == "}":
+            self._words = []
+            if self._stack:
+                records.extend(self._close_block())
+        elif t == "#":
+            header = T_FILE_HEADER.match(term)
+            if header:
+                while self._stack:
+                    records.extend(self._close_block())
+                self._file = header.group(1)
+                self._words = []
+
+    def _close_block(self):
+        block = self._stack.pop()
+        if len(self._stack) != self._kept_depth:
+            return []
+        self._kept_depth = -1
+        if block.name == "upstream":
+            if not block.args:
+                return []
+            servers = [d.args[0] for d in block.find("server") if d.args]
+            self._upstreams[block.args[0]] = servers
+            return [("upstream", {"name": block.args[0], "servers": servers, "file": block.file})]
+        if self._waits_for_upstream(block):
+            self._held.append(block)
+            return []
+        return [("server", server_dict_from_block(block, self._upstreams))]
+
+    def _waits_for_upstream(self, block):
+        for node in block.walk():
+            if node.name == "proxy_pass" and node.args:
+                target = " ".join(node.args).strip().strip('"').strip("'")
+                if "://" not in target and not target.startswith("unix:") and target.lower() not in self._upstreams:
+                    return True
+        return False
+
+
+def iter_records(source, T=True, lines=False):
+    """Sync iterable of str/bytes lines or chunks -> (kind, record) as they complete."""
+    parser = NginxStreamParserV1(T=T, lines=lines)
+    for piece in source:
+        yield from parser.feed(piece)
+    yield from parser.close()
+
+
+async def aiter_records(source, T=True, lines=False):
+    """Async iterable of str/bytes lines or chunks -> (kind, record) as they complete."""
+    parser = NginxStreamParserV1(T=T, lines=lines)
+    async for piece in source:
+        for record in parser.feed(piece):
+            yield record
+    for record in parser.close():
+        yield record
+
+
+def server_dicts_from_stream(source, T=True, lines=False):
+    return [record for kind, record in iter_records(source, T=T, lines=lines) if kind == "server"]
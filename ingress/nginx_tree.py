@@ -0,0 +1,218 @@
+import gc
+import re
+from contextlib import contextmanager
+
+from DogeOpsPy.profiling import trace
+
+# =============================================================================
+# nginx_tree — single pass tokenizer + block tree for nginx configs
+# =============================================================================
+# One compiled regex walks the text once, a statement per match (quotes, comments, ${var}
+# aware), and a stack turns the statements into a tree of Directive nodes. Everything in ingress.nginx that used to
+# re-join lines and run regexes over them is now a walk over this tree.
+#
+# QuickStart:
+# root = parse_conf(open("/etc/nginx/nginx.conf").read())
+# root = parse_T(nginx_T_output)                    # raw `nginx -T`, files split on their headers
+# for server in root.find_blocks("server"):
+#     print(server.file, [d.args for d in server.find("listen")])
+# server_dicts_from_tree(root)                      # same shape as nginx.conf_to_server_dicts()
+#
+# NOTES:
+# 1) `nginx -T` prints every file in full under a "# configuration file <path>:" header.
+#    Each section is parsed on its own: a block left open at the end of a file is closed
+#    there, a stray "}" is dropped, so one broken file can't swallow the next one.
+# 2) `include` stays a plain directive, the included file shows up as its own section.
+
+T_MAGIC_WORD = "syntax is ok"
+T_FILE_HEADER = re.compile(r"# configuration file (\S+?):\s*$")
+T_TEST_LINE = re.compile(r"nginx: configuration file \S+ test (?:failed|is successful)")
+
+# One match per statement: (body, terminator). The body keeps quoted strings and ${var} whole,
+# the terminator is ";", "{", "}", a comment, or the end of the text.
+# Possessive: a body never gives back what it took, so a statement the terminator can't close
+# fails in linear time instead of retrying every split of the runs; an escape may sit on the
+# very end of a truncated text (`\` then \Z).
+_STATEMENT = re.compile(r"""
+    ((?:[^{};"'\#\\$]++|\$\{[^}\s]*\}|\$|\\(?:.|\Z)|"(?:[^"\\]|\\(?:.|\Z))*"?|'(?:[^'\\]|\\(?:.|\Z))*'?|(?<=[^\s{};])\#)*+)
+    ([{};]|\#[^\n]*|\Z)
+""", re.X | re.S)
+# Words of a body that needs more than str.split(): quotes, escapes, a "#" inside a word
+_WORD = re.compile(r"""
+    "(?:[^"\\]|\\(?:.|\Z))*"?
+  | '(?:[^'\\]|\\(?:.|\Z))*'?
+  | (?:[^\s"'\\]++|\\(?:.|\Z))++
+""", re.X | re.S)
+_QUOTE_ESCAPE = re.compile(r"""\\(["'\\])""")
+
+
+@contextmanager
+def gc_paused():
+    # Building 100k+ small acyclic objects: the cyclic GC would rescan the growing heap over and over
+    was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
+
+
+class Directive:
+    __slots__ = ("name", "args", "children", "file")
+
+    def __init__(self, name, args, children=None, file=""):
+        self.name = name
+        self.args = args
+        self.children = children  # None for "name args;", list for "name args { ... }"
+        self.file = file
+
+    @property
+    def is_block(self):
+        return self.children is not None
+
+    def find(self, name):
+        """Direct children called `name`."""
+        return [child for child in self.children or () if child.name == name]
+
+    def walk(self):
+        """Every node below this one, document order."""
+        stack = list(reversed(self.children or ()))
+        while stack:
+            node = stack.pop()
+            yield node
+            if node.children:
+                stack.extend(reversed(node.children))
+
+    def find_all(self, name):
+        return [node for node in self.walk() if node.name == name]
+
+    def find_blocks(self, name):
+        return [node for node in self.walk() if node.name == name and node.children is not None]
+
+    def __repr__(self):
+        kind = f"{{{len(self.children)}}}" if self.children is not None else ";"
+        return f"Directive({self.name!r}, {self.args!r}{kind})"
+
+
+def split_statements(text):
+    """[(body, terminator), ...]; a last terminator of "" means the text ended mid-statement."""
+    return _STATEMENT.findall(text)
+
+
+def split_words(body):
+    if '"' not in body and "'" not in body and "\\" not in body:
+        return body.split()  # the common case, all in C
+    words = []
+    for token in _WORD.findall(body):
+        if token[0] == '"' or token[0] == "'":
+            value = token[1:-1] if len(token) > 1 and token[-1] == token[0] else token[1:]
+            token = _QUOTE_ESCAPE.sub(r"\1", value) if "\\" in value else value
+        words.append(token)
+    return words
+
+
+@trace.traced("nginx.parse")
+def parse_conf(text, file="", root=None):
+    """Parse one config text into a tree, appended under `root` (a fresh root if None)."""
+    if root is None:
+        root = Directive("", [], [], file)
+    with gc_paused():
+        _build(split_statements(text), root, file)
+    return root
+
+
+def _build(statements, root, file):
+    stack = [root]
+    children = root.children
+    words = []  # a statement can run across comments: "listen 80 # x\n ssl;"
+    for body, term in statements:
+        if body and not body.isspace():
+            if '"' in body or "'" in body or "\\" in body:
+                words.extend(split_words(body))
+            else:
+                words.extend(body.split())
+        t = term[:1]
+        if t == ";":
+            if words:
+                children.append(Directive(words[0], words[1:], None, file))
+                words = []
+        elif t == "{":
+            children.append(Directive(words[0] if words else "", words[1:], [], file))
+            stack.append(children[-1])
+            children = children[-1].children
+            words = []
+        elif t == "}":
+            words = []
+            if len(stack) > 1:
+                stack.pop()
+                children = stack[-1].children
+        elif t == "#":
+            header = T_FILE_HEADER.match(term)
+            if header:
+                # New file section of nginx -T: close whatever the last file left open
+                file = header.group(1)
+                del stack[1:]
+                children = root.children
+                words = []
+
+
+def strip_T(T_result):
+    """Drop the `nginx -T` preamble and test result lines, "" if the test didn't pass."""
+    if T_MAGIC_WORD not in T_result:
+        return ""
+    return T_TEST_LINE.sub("", T_result.split(T_MAGIC_WORD, 1)[1])
+
+
+def parse_T(T_result):
+    return parse_conf(strip_T(T_result))
+
+
+def upstreams_from_tree(root):
+    upstreams = {}
+    for block in root.find_blocks("upstream"):
+        if block.args:
+            upstreams[block.args[0]] = [d.args[0] for d in block.find("server") if d.args]
+    return upstreams
+
+
+def server_dict_from_block(block, upstreams_dict):
+    server_data = {
+        "listen": {},
+        "ssl": "",
+        "proxy_protocol": False,
+        "proxy": [],
+        "l7": []
+    }
+    cert = key = None
+    for node in block.walk():
+        name = node.name
+        if name == "listen" and node.args:
+            server_data["listen"][node.args[0]] = " ".join(node.args[1:])
+        elif name == "ssl_certificate" and cert is None and node.args:
+            cert = node.args[0]
+        elif name == "ssl_certificate_key" and key is None and node.args:
+            key = node.args[0]
+        elif name == "proxy_protocol" and node.args[:1] == ["on"]:
+            server_data["proxy_protocol"] = True
+        elif name == "proxy_pass" and node.args:
+            target = " ".join(node.args).strip().strip('"').strip("'")
+            lookup_key = target.lower() if "://" not in target and not target.startswith("unix:") else target
+            if lookup_key in upstreams_dict:
+                server_data["proxy"].extend(upstreams_dict[lookup_key])
+            else:
+                server_data["proxy"].append(target)
+        elif name == "location" and node.children is not None and node.args:
+            server_data["l7"].append(node.args[0])
+
+    server_data["listen"] = dict(sorted(server_data["listen"].items()))
+    server_data["ssl"] = ";".join(p for p in (cert, key) if p)
+    return server_data
+
+
+@trace.traced("nginx.server_dicts")
+def server_dicts_from_tree(root, upstreams_dict=None):
+    if upstreams_dict is None:
+        upstreams_dict = upstreams_from_tree(root)
+    with gc_paused():
+        return [server_dict_from_block(block, upstreams_dict) for block in root.find_blocks("server")]
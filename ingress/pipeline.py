@@ -0,0 +1,348 @@
+import asyncio
+import os
+import shlex
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from DogeOpsPy.ingress import envoy, envoy_loader
+from DogeOpsPy.ingress.batch import pack_servers, unpack_servers
+from DogeOpsPy.ingress.envoy_discovery import EnvoyContainerCacheV1
+from DogeOpsPy.ingress.index import InventoryIndexV1
+from DogeOpsPy.ingress.nginx_tree import parse_T, server_dicts_from_tree, upstreams_from_tree
+from DogeOpsPy.linux.ssh import DirectSSH
+from DogeOpsPy.profiling import trace
+
+# =============================================================================
+# InventoryPipelineV1 — fleet ingress inventory: fetch -> parse -> index, streaming (user guide)
+# =============================================================================
+# Three stages, each with its own bound, connected by bounded queues:
+#
+#   inventory --> [fetch]  SSH in threads, `fetch_concurrency` hosts at once
+#                   |      nginx: `nginx -T`;  envoy: docker discovery + `docker exec cat <config>`
+#              parse_q     (queue_size, a full queue pauses fetching = backpressure)
+#                   |
+#                 [parse]  process pool, `parse_workers` configs at once
+#              output_q
+#                   |
+#                 [sink]   InventoryIndexV1.update() + your callback, yielded to you
+#
+# Hosts flow through independently: a refresh takes as long as the slowest host (plus
+# queueing), not the sum of all hosts. Whatever fails (connect, nginx -T, parse, sink)
+# only fails that host, it comes out as a HostReport with `error` and `stage` set.
+#
+# -----------------------------------------------------------------------------
+# Init Options:
+#   inventory.           # "host" strings or dicts of ssh kwargs, + optional "kind": "nginx"/"envoy"
+#   kind.                # Default kind for entries without one
+#   fetch_concurrency.   # Hosts being fetched at once
+#   parse_workers.       # Process pool size, default os.cpu_count(); 1 = one thread, no pool
+#   queue_size.          # Bound of each queue between stages
+#   timeout.             # Per command (sec)
+#   index.               # InventoryIndexV1 to update, a new one by default
+#   sink.                # Optional callable(report), runs in the event loop after the index update
+#   nginx_cmd.           # Default "nginx -T 2>&1", e.g. "sudo nginx -T 2>&1"
+#   docker.              # Docker prefix for envoy discovery, e.g. "sudo docker"
+#   compact.             # True: ServerRecord (ingress.record) instead of dicts
+#   ssh_cls.             # Connection class, DirectSSH by default
+#   **ssh_kwargs.        # Defaults for every host (user, key_path, password, port ...)
+#
+# -----------------------------------------------------------------------------
+# Methods:
+# async for report in instance.run():   # HostReport per host (per envoy container), as they finish
+# await instance.run_all()              # [HostReport, ...]
+# instance.refresh()                    # sync: asyncio.run(run_all())
+# instance.progress()                   # live counters + per stage latency, safe to poll while running
+#
+# -----------------------------------------------------------------------------
+# QuickStart:
+# pipeline = InventoryPipelineV1(
+#     inventory=["edge-1", "edge-2", {"host": "mesh-1", "kind": "envoy"}],
+#     fetch_concurrency=200, user="ops", key_path="~/.ssh/id_ed25519",
+#     nginx_cmd="sudo nginx -T 2>&1", docker="sudo docker",
+# )
+# async for r in pipeline.run():
+#     print(r.label, r.error or len(r.servers), {k: f"{v:.2f}" for k, v in r.timings.items()})
+# print(pipeline.progress())
+# pipeline.index.by_backend("10.0.3.7:8080")
+#
+# -----------------------------------------------------------------------------
+# NOTES:
+# 1) Envoy hosts yield one report per Envoy container, labelled "host/<container id[:12]>",
+#    that label is also the index key. Discovery results are cached across runs per host;
+#    after each fetch of a host, labels of its containers that are gone leave the index.
+# 2) Breaking out of run() early cancels what's in flight and shuts the pools down.
+
+STAGES = ("fetch", "parse", "sink")
+
+
+class HostReport:
+    __slots__ = ("host", "label", "kind", "servers", "upstreams", "error", "stage", "timings", "started", "elapsed")
+
+    def __init__(self, host, kind, label=None):
+        self.host = host
+        self.label = label or host
+        self.kind = kind
+        self.servers = []
+        self.upstreams = {}
+        self.error = ""
+        self.stage = ""  # stage that failed, "" if none
+        self.timings = {}  # stage -> sec, plus "parse_wait": time spent queued before parse
+        self.started = time.monotonic()
+        self.elapsed = 0.0
+
+    @property
+    def ok(self):
+        return not self.error
+
+    def __repr__(self):
+        return f"HostReport({self.label!r}, {self.kind}, servers={len(self.servers)}, error={self.error!r})"
+
+
+class StageStats:
+    def __init__(self):
+        self.in_flight = 0
+        self.done = 0
+        self.failed = 0
+        self.latencies = []
+
+    def report(self):
+        ordered = sorted(self.latencies)
+
+        def pick(q):
+            return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+        return {
+            "in_flight": self.in_flight,
+            "done": self.done,
+            "failed": self.failed,
+            "p50": pick(0.5),
+            "p95": pick(0.95),
+            "max": ordered[-1] if ordered else 0.0,
+        }
+
+
+def parse_host_config(kind, raw):
+    """(servers, upstreams) of one raw config, upstreams being {name: [servers]}."""
+    if kind == "envoy":
+        conf = envoy_loader.load_conf(raw)
+        return envoy.conf_to_server_dicts(conf), envoy.conf_to_clusters(conf)
+    if kind == "nginx":
+        if isinstance(raw, (bytes, bytearray)):
+            raw = raw.decode("utf-8", errors="replace")
+        root = parse_T(raw)
+        upstreams = upstreams_from_tree(root)
+        return server_dicts_from_tree(root, upstreams), upstreams
+    raise ValueError(f"Unknown config kind {kind!r}, use 'nginx' or 'envoy'")
+
+
+def _parse_job(job):
+    # Runs in a pool worker: module level (picklable), never raises
+    kind, raw = job
+    t0 = time.monotonic()
+    try:
+        servers, upstreams = parse_host_config(kind, raw)
+        return pack_servers(servers), upstreams, "", time.monotonic() - t0
+    except Exception as e:
+        return (), {}, f"{type(e).__name__}: {e}", time.monotonic() - t0
+
+
+class InventoryPipelineV1:
+    def __init__(self, inventory, kind="nginx", fetch_concurrency=64, parse_workers=None, queue_size=None, timeout=30,
+                 index=None, sink=None, nginx_cmd="nginx -T 2>&1", docker="docker", compact=False, ssh_cls=DirectSSH,
+                 **ssh_kwargs):
+        # INPUT
+        self.inventory = inventory
+        self.kind = kind
+        self.fetch_concurrency = max(1, int(fetch_concurrency))
+        self.parse_workers = parse_workers or os.cpu_count() or 1
+        self.queue_size = queue_size or self.parse_workers * 4
+        self.timeout = timeout
+        self.index = index if index is not None else InventoryIndexV1()
+        self.sink = sink
+        self.nginx_cmd = nginx_cmd
+        self.docker = docker
+        self.compact = compact
+        self.ssh_cls = ssh_cls
+        self.ssh_kwargs = ssh_kwargs
+
+        # DataStructures
+        self._discovery = {}  # host -> EnvoyContainerCacheV1, kept across runs
+        self._discovery_lock = threading.Lock()  # fetch_one() runs in the fetch pool threads
+        self._labels = {}  # envoy host -> labels it had in the index after its last fetch
+        self._stats = {stage: StageStats() for stage in STAGES}
+        self._queues = {}
+        self._t0 = None
+
+    # ===== fetch stage (worker threads) =====
+    def host_kwargs(self, entry):
+        kwargs = dict(self.ssh_kwargs)
+        if isinstance(entry, dict):
+            kwargs.update(entry)
+        else:
+            kwargs["host"] = entry
+        kind = kwargs.pop("kind", self.kind)
+        kwargs.setdefault("timeout", self.timeout)
+        return kind, kwargs
+
+    def fetch_one(self, kind, kwargs):
+        """[(label, raw), ...] of one host; raises on any failure."""
+        host = kwargs["host"]
+        with trace.span("pipeline.fetch", host=host, kind=kind), self.ssh_cls(**kwargs) as conn:
+            if kind == "nginx":
+                rc, out, err = conn.exec_rc(self.nginx_cmd, timeout=self.timeout)
+                if rc != 0:
+                    raise RuntimeError(f"`{self.nginx_cmd}` rc={rc}: {(out + err).strip()[-300:]}")
+                return [(host, out)]
+            if kind == "envoy":
+                with self._discovery_lock:
+                    discovery = self._discovery.get(host)
+                    if discovery is None:
+                        discovery = self._discovery[host] = EnvoyContainerCacheV1(docker=self.docker)
+                raws = []
+                for container_id, path in discovery.discover(conn).items():
+                    if not path:
+                        continue
+                    # path comes from the container's command line, never let it reach the shell unquoted
+                    command = f"{self.docker} exec {shlex.quote(container_id)} cat {shlex.quote(path)}"
+                    rc, out, err = conn.exec_rc(command, timeout=self.timeout)
+                    if rc != 0:
+                        raise RuntimeError(f"`{command}` rc={rc}: {err.strip()[-300:]}")
+                    raws.append((f"{host}/{container_id[:12]}", out))
+                return raws
+        raise ValueError(f"Unknown config kind {kind!r}, use 'nginx' or 'envoy'")
+
+    # ===== pipeline =====
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        self._stats = {stage: StageStats() for stage in STAGES}
+        self._t0 = time.monotonic()
+        entries = iter(self.inventory)
+        parse_q = asyncio.Queue(maxsize=self.queue_size)
+        output_q = asyncio.Queue(maxsize=self.queue_size)
+        self._queues = {"parse": parse_q, "output": output_q}
+        done = object()
+
+        fetch_pool = ThreadPoolExecutor(max_workers=self.fetch_concurrency)
+        if self.parse_workers > 1:
+            parse_pool = ProcessPoolExecutor(max_workers=self.parse_workers)
+        else:
+            parse_pool = ThreadPoolExecutor(max_workers=1)
+
+        async def fetcher():
+            stats = self._stats["fetch"]
+            for entry in entries:  # shared iterator, every host is taken exactly once
+                kind, kwargs = self.host_kwargs(entry)
+                report = HostReport(kwargs.get("host", ""), kind)
+                stats.in_flight += 1
+                t0 = time.monotonic()
+                try:
+                    raws = await loop.run_in_executor(fetch_pool, trace.bind(self.fetch_one), kind, kwargs)
+                except Exception as e:
+                    raws = None
+                    report.error, report.stage = f"{type(e).__name__}: {e}", "fetch"
+                stats.in_flight -= 1
+                report.timings["fetch"] = time.monotonic() - t0
+                stats.latencies.append(report.timings["fetch"])
+                if raws is None:
+                    stats.failed += 1
+                    await output_q.put(report)
+                    continue
+                stats.done += 1
+                if kind == "envoy":
+                    self._forget_gone(report.host, {label for label, _ in raws})
+                for label, raw in raws:
+                    item = HostReport(report.host, kind, label)
+                    item.started = report.started
+                    item.timings = dict(report.timings)
+                    await parse_q.put((item, raw, time.monotonic()))
+
+        async def parser():
+            stats = self._stats["parse"]
+            while True:
+                job = await parse_q.get()
+                if job is done:
+                    await output_q.put(done)
+                    return
+                report, raw, queued = job
+                report.timings["parse_wait"] = time.monotonic() - queued
+                stats.in_flight += 1
+                try:
+                    packed, upstreams, error, elapsed = await loop.run_in_executor(parse_pool, _parse_job,
+                                                                                  (report.kind, raw))
+                except Exception as e:  # broken pool, unpicklable input ...
+                    packed, upstreams, error, elapsed = (), {}, f"{type(e).__name__}: {e}", 0.0
+                del raw, job
+                stats.in_flight -= 1
+                report.timings["parse"] = elapsed
+                stats.latencies.append(elapsed)
+                if error:
+                    stats.failed += 1
+                    report.error, report.stage = error, "parse"
+                else:
+                    stats.done += 1
+                    report.servers = unpack_servers(packed, self.compact)
+                    report.upstreams = upstreams
+                await output_q.put(report)
+
+        async def feeder():
+            try:
+                await asyncio.gather(*(fetcher() for _ in range(self.fetch_concurrency)))
+            except Exception as e:
+                print(f"InventoryPipelineV1 fetch stage died: {e}", file=sys.stderr)
+            for _ in range(self.parse_workers):
+                await parse_q.put(done)
+
+        tasks = [asyncio.create_task(feeder())]
+        tasks += [asyncio.create_task(parser()) for _ in range(self.parse_workers)]
+        running = self.parse_workers
+        try:
+            while running:
+                report = await output_q.get()
+                if report is done:
+                    running -= 1
+                    continue
+                if not report.error:
+                    self._sink(report)
+                report.elapsed = time.monotonic() - report.started
+                yield report
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            fetch_pool.shutdown(wait=False, cancel_futures=True)
+            parse_pool.shutdown(wait=False, cancel_futures=True)
+
+    def _forget_gone(self, host, labels):
+        # Containers gone (or recreated under a new id) since the last fetch: out of the index,
+        # nothing else would ever remove their listeners
+        for label in self._labels.get(host, set()) - labels:
+            self.index.remove(label)
+        self._labels[host] = labels
+
+    def _sink(self, report):
+        stats = self._stats["sink"]
+        t0 = time.monotonic()
+        try:
+            self.index.update(report.label, report.servers, report.upstreams)
+            if self.sink is not None:
+                self.sink(report)
+            stats.done += 1
+        except Exception as e:
+            stats.failed += 1
+            report.error, report.stage = f"{type(e).__name__}: {e}", "sink"
+        report.timings["sink"] = time.monotonic() - t0
+        stats.latencies.append(report.timings["sink"])
+
+    async def run_all(self):
+        return [report async for report in self.run()]
+
+    def refresh(self):
+        return asyncio.run(self.run_all())
+
+    def progress(self):
+        progress = {stage: stats.report() for stage, stats in self._stats.items()}
+        progress["queued"] = {name: queue.qsize() for name, queue in self._queues.items()}
+        progress["wall"] = time.monotonic() - self._t0 if self._t0 is not None else 0.0
+        return progress
@@ -0,0 +1,111 @@
+import sys
+from collections.abc import Mapping
+
+# =============================================================================
+# ServerRecord — compact, interned form of one ingress server dict (user guide)
+# =============================================================================
+# nginx/envoy conf_to_server_dicts() give one dict per listener, each with its own inner
+# dict, two lists and its own copies of every string. Across a fleet the same cert paths,
+# backends and "default_server" flags repeat hundreds of thousands of times.
+# A ServerRecord is 5 slots:
+#   listen          # tuple of (address, flags) pairs, sorted like the dict was
+#   ssl             # str
+#   proxy_protocol  # bool
+#   proxy           # tuple of str
+#   l7              # tuple of str
+# Every string goes through sys.intern() and every tuple through one shared table, so two
+# listeners pointing at the same upstream hold the same tuple object.
+#
+# It is a read-only Mapping with the old keys: record["proxy"], record.get("ssl"),
+# dict(record) all keep working, values come back as the dict/list types the old dicts had.
+#
+# -----------------------------------------------------------------------------
+# QuickStart:
+# records = nginx.T_to_server_dicts(T_result, compact=True)
+# records = envoy.conf_to_server_dicts(conf, compact=True)
+# records = to_records(server_dicts)              # from dicts you already have
+# records[0].proxy                                # tuple, no copy
+# records[0]["proxy"]                             # list, a fresh copy
+# records[0].to_dict()                            # plain dict, same as the parser used to return
+#
+# -----------------------------------------------------------------------------
+# NOTES:
+# 1) The shared tuple table lives as long as the process, like sys.intern(); call
+#    clear_interned() after dropping a whole inventory if it matters.
+# 2) Records are hashable and compare equal to each other and to the equivalent dict.
+
+FIELDS = ("listen", "ssl", "proxy_protocol", "proxy", "l7")
+
+_tuples = {}
+
+
+def intern_tuple(items):
+    items = tuple(sys.intern(s) if type(s) is str else s for s in items)
+    return _tuples.setdefault(items, items)
+
+
+def clear_interned():
+    _tuples.clear()
+
+
+class ServerRecord(Mapping):
+    __slots__ = FIELDS
+
+    def __init__(self, listen=(), ssl="", proxy_protocol=False, proxy=(), l7=()):
+        self.listen = intern_tuple(intern_tuple(pair) for pair in listen)
+        self.ssl = sys.intern(ssl)
+        self.proxy_protocol = bool(proxy_protocol)
+        self.proxy = intern_tuple(proxy)
+        self.l7 = intern_tuple(l7)
+
+    @classmethod
+    def from_dict(cls, server):
+        return cls(server.get("listen", {}).items(), server.get("ssl", ""), server.get("proxy_protocol", False),
+                   server.get("proxy", ()), server.get("l7", ()))
+
+    def to_dict(self):
+        return {"listen": dict(self.listen), "ssl": self.ssl, "proxy_protocol": self.proxy_protocol,
+                "proxy": list(self.proxy), "l7": list(self.l7)}
+
+    def astuple(self):
+        return self.listen, self.ssl, self.proxy_protocol, self.proxy, self.l7
+
+    # ===== Mapping view =====
+    def __getitem__(self, key):
+        if key == "listen":
+            return dict(self.listen)
+        if key == "proxy" or key == "l7":
+            return list(getattr(self, key))
+        if key == "ssl" or key == "proxy_protocol":
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(FIELDS)
+
+    def __len__(self):
+        return len(FIELDS)
+
+    def __eq__(self, other):
+        if isinstance(other, ServerRecord):
+            return self.astuple() == other.astuple()
+        if isinstance(other, Mapping):
+            return self.to_dict() == dict(other)
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.astuple())
+
+    def __reduce__(self):
+        return ServerRecord, self.astuple()
+
+    def __repr__(self):
+        return f"ServerRecord(listen={dict(self.listen)}, ssl={self.ssl!r}, proxy={len(self.proxy)}, l7={len(self.l7)})"
+
+
+def to_records(server_dicts):
+    return [ServerRecord.from_dict(server) for server in server_dicts]
+
+
+def to_dicts(records):
+    return [record.to_dict() for record in records]
@@ -0,0 +1,214 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+
+# =============================================================================
+# ExecCacheV1 — TTL + LRU cache of read-only remote command results (user guide)
+# =============================================================================
+# Jobs that run `nginx -T`, `docker inspect`, `cat <envoy.yaml>` against the same hosts
+# seconds apart each pay an SSH round trip (two hops through a bastion). Handed to
+# DirectSSH / BastionJumpSSH as exec_cache=..., results are kept per (host, user, command):
+#   fresh entry        -> returned, no remote call
+#   same call running  -> waits for it and gets its result (single flight, any thread)
+#   else               -> runs, result kept for `ttl` seconds, LRU bounded by `max_entries`
+# One cache is meant to be shared by every connection / thread of a process.
+#
+# -----------------------------------------------------------------------------
+# Init Options:
+#   ttl.           # Seconds a result stays fresh
+#   max_entries.   # LRU size
+#   cacheable.     # callable(command) -> bool, which commands may be cached (default: is_read_only)
+#
+# -----------------------------------------------------------------------------
+# Methods:
+# instance.call(host, user, command, fn, keep=None)   # fn() -> result, through the cache if cacheable
+# instance.run(key, fn, ttl=None, keep=None)          # same, any hashable key, no cacheable check
+# instance.invalidate(host=None, user=None, command=None)
+# instance.invalidate_for(host, command)              # command ran outside the cache: drop host if not cacheable
+# instance.clear()
+# instance.stats()        # {"hits", "misses", "coalesced", "expired", "evictions", "size", "in_flight"}
+#
+# -----------------------------------------------------------------------------
+# QuickStart:
+# cache = ExecCacheV1(ttl=10)
+# with DirectSSH(host, user, key_path=key, exec_cache=cache) as conn:
+#     conn.exec_rc("nginx -T 2>&1")     # remote
+#     conn.exec_rc("nginx -T 2>&1")     # cached
+#
+# runner = FleetRunnerV1(inventory, "sudo docker inspect app", user="ops", exec_cache=cache)
+# pipeline = InventoryPipelineV1(inventory, user="ops", exec_cache=cache)
+#
+# -----------------------------------------------------------------------------
+# NOTES:
+# 1) Only what `cacheable` accepts is cached, the default takes plain `nginx -T`, `cat`, `docker
+#    inspect/ps` and `docker exec <id> cat` (sudo, /abs/path/ to the program and 2>&1 allowed,
+#    no ; && | > $(...)).
+#    Anything else runs every time.
+# 2) Exceptions are never cached, every waiter of that flight gets the exception. keep(result)
+#    -> False also skips storing (DirectSSH doesn't keep rc != 0).
+# 3) Writes (write_file(s)/upload) and every command `cacheable` refuses drop the cached results
+#    of that host, whichever way it ran (exec, exec_rc, exec_stream, iter_exec, exec_many): a
+#    `sed -i` or `systemctl reload` between two `cat`s is seen. exec* drop them once the command
+#    is done, iter_exec when it starts (the stream may never be read to the end).
+# 4) Connections still connect, only the command is saved; keep connections open for the
+#    whole job to save the handshake too.
+# 5) BastionJumpSSH.exec has no rc and runs in a login shell that keeps state (cwd, PATH, aliases),
+#    so it only caches what shell_cacheable() accepts: an absolute executable (`/usr/bin/cat
+#    /etc/x`, `sudo /usr/sbin/nginx -T`), absolute `cat` paths, and then only output that doesn't
+#    look like an error (`No such file`, `Permission denied`, `[sudo]`, `Error...`). Everything
+#    else through a bastion runs every time.
+#    In this repo that means no hits at all: the default commands are plain (`nginx -T`, `docker`),
+#    envoy_discovery talks to a bastion through exec_many (never cached), and fleet / pipeline
+#    call exec_rc, which only DirectSSH has. Only your own exec("/usr/bin/cat /etc/x") benefits.
+
+_READ_ONLY = re.compile(
+    r"^\s*(?:sudo\s+(?:-\S+\s+)*)?(?:/\S*/)?"
+    r"(?:nginx\s+-T\b|cat\s|docker\s+(?:inspect|ps)\b|docker\s+exec\s+(?:-\S+\s+)*\S+\s+cat\s)"
+)
+# Chaining, redirects, pipes, substitutions: the first word says nothing about the rest
+_SHELL_CONTROL = re.compile(r"[;&|<>`\n]|\$\(")
+
+
+# What a failed command prints where BastionJumpSSH can't see an rc
+_ERROR_OUTPUT = re.compile(
+    r"No such file or directory|Permission denied|command not found|Is a directory"
+    r"|^\[sudo\]|^sudo: |^Error|\[emerg\]|test failed",
+    re.M,
+)
+
+
+def is_read_only(command):
+    command = command.replace("2>&1", "")
+    return bool(_READ_ONLY.match(command)) and not _SHELL_CONTROL.search(command)
+
+
+def shell_cacheable(command):
+    # is_read_only() with an absolute executable, and absolute operands for a plain `cat`:
+    # neither the cwd nor PATH of a long-lived shell changes what it reads
+    words = command.replace("2>&1", "").split()
+    i = 0
+    if words[:1] == ["sudo"]:
+        i = 1
+        while i < len(words) and words[i].startswith("-"):
+            i += 1
+    if i >= len(words) or not words[i].startswith("/"):
+        return False
+    if not is_read_only(command):
+        return False
+    if words[i].rsplit("/", 1)[1] == "cat":
+        files = [word for word in words[i + 1:] if not word.startswith("-")]
+        return bool(files) and all(word.startswith("/") for word in files)
+    return True
+
+
+def looks_like_error(output):
+    return bool(_ERROR_OUTPUT.search(output))
+
+
+class _Flight:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class ExecCacheV1:
+    def __init__(self, ttl=10, max_entries=1024, cacheable=is_read_only, clock=time.monotonic):
+        # INPUT
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.cacheable = cacheable
+        self.clock = clock
+
+        # DataStructures
+        self._entries = OrderedDict()  # key -> (expires_at, result), LRU order
+        self._flights = {}  # key -> _Flight running right now
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.expired = 0
+        self.evictions = 0
+
+    def call(self, host, user, command, fn, keep=None):
+        if self.cacheable is not None and not self.cacheable(command):
+            try:
+                return fn()
+            finally:
+                self.invalidate(host=host)  # may have changed what the cached reads saw
+        return self.run((host, user, command), fn, keep=keep)
+
+    def invalidate_for(self, host, command):
+        if self.cacheable is not None and not self.cacheable(command):
+            self.invalidate(host=host)
+
+    def run(self, key, fn, ttl=None, keep=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > self.clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+                self.expired += 1
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fn()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                # invalidate() while running drops the flight: its result is served but not kept
+                current = self._flights.get(key) is flight
+                if current:
+                    del self._flights[key]
+                if current and flight.error is None and (keep is None or keep(flight.result)):
+                    self._entries[key] = (self.clock() + (self.ttl if ttl is None else ttl), flight.result)
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+                        self.evictions += 1
+            flight.done.set()
+        return flight.result
+
+    def invalidate(self, host=None, user=None, command=None):
+        def match(key):
+            return (isinstance(key, tuple) and len(key) == 3
+                    and (host is None or key[0] == host)
+                    and (user is None or key[1] == user)
+                    and (command is None or key[2] == command))
+
+        with self._lock:
+            for key in [key for key in self._entries if match(key)]:
+                del self._entries[key]
+            for key in [key for key in self._flights if match(key)]:
+                del self._flights[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._flights.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "coalesced": self.coalesced,
+                    "expired": self.expired, "evictions": self.evictions,
+                    "size": len(self._entries), "in_flight": len(self._flights)}
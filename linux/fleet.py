@@ -0,0 +1,228 @@
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from DogeOpsPy.linux.ssh import DirectSSH
+
+# =============================================================================
+# FleetRunnerV1 — Run one command on many hosts over DirectSSH (user guide)
+# =============================================================================
+# paramiko is blocking, so every host gets a worker thread; at most `concurrency`
+# hosts are connected at the same time and results come back as they finish.
+#
+# -----------------------------------------------------------------------------
+# Init Options:
+#   inventory.     # list of "host" strings or dicts of DirectSSH kwargs {"host":..., "user":...}
+#   command.       # str for every host, dict {host: command}, or callable(host) -> command
+#   concurrency.   # Max hosts in flight
+#   timeout.       # Connect timeout and exec idle timeout (sec): no output for that long fails the host
+#   host_timeout.  # Wall-clock limit per host (sec), connect + exec, None = only `timeout` applies
+#   max_capture.   # Keep only the last N bytes of stdout/stderr per host, None keeps all
+#   ssh_cls.       # Connection class, DirectSSH by default
+#   **ssh_kwargs.  # Defaults for every host (user, key_path, password, port ...)
+#
+# -----------------------------------------------------------------------------
+# Methods:
+# for result in instance.run():    # Yields FleetResult per host, in completion order
+# instance.summary().              # Run everything, return FleetSummary
+#
+# -----------------------------------------------------------------------------
+# QuickStart:
+# runner = FleetRunnerV1(
+#     inventory=["10.0.0.1", "10.0.0.2", {"host": "10.0.0.3", "port": 2222}],
+#     command="cat /etc/os-release",
+#     concurrency=100,
+#     timeout=5,
+#     host_timeout=60,
+#     user="ops",
+#     key_path="~/.ssh/id_ed25519",
+# )
+# for r in runner.run():
+#     print(r.host, r.rc, f"{r.elapsed:.2f}s", r.error or r.out[:80])
+#
+# summary = FleetSummary()
+# for r in runner.run():
+#     summary.add(r)
+# for group in summary.groups():
+#     print(len(group["hosts"]), "hosts said:", group["out"])
+#
+# -----------------------------------------------------------------------------
+# NOTES:
+# 1) A host that fails to connect or times out yields a FleetResult with rc=-1 and `error` set,
+#    it never raises out of run().
+# 2) Hosts are submitted lazily, so a huge inventory only keeps `concurrency` futures alive.
+# 3) `timeout` alone never stops a host that keeps printing something (a trickling log, a
+#    progress bar). host_timeout does: once it's up the connection is closed under the running
+#    command and the result says "TimeoutError: ...". A connect slower than host_timeout is only
+#    cut once it completes (it is bounded by `timeout` anyway).
+
+
+class FleetResult:
+    __slots__ = ("host", "command", "rc", "out", "err", "error", "started", "elapsed")
+
+    def __init__(self, host, command, rc=-1, out="", err="", error="", started=0.0, elapsed=0.0):
+        self.host = host
+        self.command = command
+        self.rc = rc
+        self.out = out
+        self.err = err
+        self.error = error
+        self.started = started
+        self.elapsed = elapsed
+
+    @property
+    def ok(self):
+        return not self.error and self.rc == 0
+
+    def fingerprint(self):
+        h = hashlib.sha1()
+        for part in (str(self.rc), self.out, self.err, self.error):
+            h.update(part.encode("utf-8", errors="replace"))
+            h.update(b"\0")
+        return h.hexdigest()
+
+    def to_dict(self):
+        return {k: getattr(self, k) for k in self.__slots__}
+
+    def __repr__(self):
+        return f"FleetResult(host={self.host!r}, rc={self.rc}, elapsed={self.elapsed:.3f}, error={self.error!r})"
+
+
+class FleetSummary:
+    """Groups identical replies, so memory grows with unique outputs, not with hosts."""
+
+    def __init__(self):
+        self._groups = {}
+        self.total = 0
+        self.failed = 0
+        self.max_elapsed = 0.0
+        self.sum_elapsed = 0.0
+
+    def add(self, result):
+        self.total += 1
+        if not result.ok:
+            self.failed += 1
+        self.max_elapsed = max(self.max_elapsed, result.elapsed)
+        self.sum_elapsed += result.elapsed
+
+        key = result.fingerprint()
+        group = self._groups.get(key)
+        if group is None:
+            group = {
+                "rc": result.rc,
+                "out": result.out,
+                "err": result.err,
+                "error": result.error,
+                "hosts": [],
+            }
+            self._groups[key] = group
+        group["hosts"].append(result.host)
+        return key
+
+    def groups(self):
+        # Biggest group first, the odd ones out are usually what you look for
+        return sorted(self._groups.values(), key=lambda g: len(g["hosts"]), reverse=True)
+
+    def unique_count(self):
+        return len(self._groups)
+
+    def report(self):
+        avg = self.sum_elapsed / self.total if self.total else 0.0
+        return {
+            "total": self.total,
+            "failed": self.failed,
+            "unique": self.unique_count(),
+            "avg_elapsed": avg,
+            "max_elapsed": self.max_elapsed,
+        }
+
+
+class FleetRunnerV1:
+    def __init__(self, inventory, command, concurrency=64, timeout=10, max_capture=None, ssh_cls=DirectSSH,
+                 host_timeout=None, **ssh_kwargs):
+        # INPUT
+        self.inventory = inventory
+        self.command = command
+        self.concurrency = max(1, int(concurrency))
+        self.timeout = timeout
+        self.host_timeout = host_timeout
+        self.max_capture = max_capture
+        self.ssh_cls = ssh_cls
+        self.ssh_kwargs = ssh_kwargs
+
+    def command_for(self, host):
+        if callable(self.command):
+            return self.command(host)
+        if isinstance(self.command, dict):
+            return self.command.get(host)
+        return self.command
+
+    def host_kwargs(self, entry):
+        kwargs = dict(self.ssh_kwargs)
+        if isinstance(entry, dict):
+            kwargs.update(entry)
+        else:
+            kwargs["host"] = entry
+        kwargs.setdefault("timeout", self.timeout)
+        return kwargs
+
+    def run_one(self, entry):
+        kwargs = self.host_kwargs(entry)
+        host = kwargs["host"]
+        command = self.command_for(host)
+        result = FleetResult(host=host, command=command, started=time.time())
+        t0 = time.monotonic()
+        timer = None
+        expired = []
+        try:
+            if not command:
+                raise ValueError(f"No command for host {host}")
+            with self.ssh_cls(**kwargs) as conn:
+                if self.host_timeout is not None:
+                    remaining = max(0.0, self.host_timeout - (time.monotonic() - t0))
+                    timer = threading.Timer(remaining, self._expire, (conn, expired))
+                    timer.daemon = True
+                    timer.start()
+                result.rc, result.out, result.err = conn.exec_rc(command, timeout=self.timeout,
+                                                                   max_capture=self.max_capture)
+        except Exception as e:
+            result.error = f"{type(e).__name__}: {e}" if str(e) else type(e).__name__
+        finally:
+            if timer is not None:
+                timer.cancel()
+        if expired:
+            # Whatever closing the connection made exec_rc return or raise, the cause is the deadline
+            result.rc = -1
+            result.error = f"TimeoutError: not done in {self.host_timeout}s"
+        result.elapsed = time.monotonic() - t0
+        return result
+
+    @staticmethod
+    def _expire(conn, expired):
+        expired.append(True)
+        conn.ssh.close()  # the running channel sees EOF / closed, exec_rc returns or raises
+
+    def run(self):
+        entries = iter(self.inventory)
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            in_flight = set()
+            for entry in entries:
+                in_flight.add(executor.submit(self.run_one, entry))
+                if len(in_flight) >= self.concurrency:
+                    break
+            while in_flight:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    # Refill before yielding, a slow consumer shouldn't idle the pool
+                    for entry in entries:
+                        in_flight.add(executor.submit(self.run_one, entry))
+                        break
+                for future in done:
+                    yield future.result()
+
+    def summary(self):
+        summary = FleetSummary()
+        for result in self.run():
+            summary.add(result)
+        return summary
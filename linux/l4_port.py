@@ -1,7 +1,162 @@
+import re
 import socket
 import sys
 from contextlib import closing
 
+_ONES_RUN = re.compile("1+")
+
+class PortSet:
+    """
+    Set of ports 0-65535 backed by one 65536-bit int (8 KB).
+    Union / intersection / difference are single big-int ops, range walks and
+    first-fit searches run over the bit string in C, no per-port python loop.
+
+    PortSet.from_range(3000, 3999) - PortSet([3001, 3002])
+    PortSet.parse("3001,3004,3009-3011").to_aggregate()  -> ['3001', '3004', '3009-3011']
+    free.first_fit(10)                                    -> first port of 10 free in a row, or -1
+    """
+    SIZE = 65536
+    __slots__ = ("_bits",)
+
+    def __init__(self, ports=None):
+        bits = 0
+        if ports is not None:
+            # Set bits in a bytearray, one int conversion at the end, not one big-int op per port
+            buf = bytearray(self.SIZE // 8)
+            for port in ports:
+                port = self._check(int(port))
+                buf[port >> 3] |= 1 << (port & 7)
+            bits = int.from_bytes(buf, "little")
+        self._bits = bits
+
+    @classmethod
+    def from_bits(cls, bits):
+        obj = cls()
+        obj._bits = bits & ((1 << cls.SIZE) - 1)
+        return obj
+
+    @classmethod
+    def from_range(cls, start, end):
+        """Inclusive range, same meaning as parse_port_range()."""
+        if start > end:
+            return cls()
+        cls._check(start)
+        cls._check(end)
+        return cls.from_bits(((1 << (end - start + 1)) - 1) << start)
+
+    @classmethod
+    def parse(cls, spec):
+        """Accepts "start-end", "3001,3009-3011" or the list aggregate_ports() returns."""
+        items = spec.split(",") if isinstance(spec, str) else spec
+        bits = 0
+        for item in items:
+            item = str(item).strip()
+            if not item:
+                continue
+            if "-" in item:
+                start, end = parse_port_range(item)
+                bits |= cls.from_range(start, end)._bits
+            elif item.isdigit():
+                bits |= 1 << cls._check(int(item))
+            else:
+                raise ValueError(f"Bad port spec {item!r}")
+        return cls.from_bits(bits)
+
+    @classmethod
+    def _check(cls, port):
+        if not 0 <= port < cls.SIZE:
+            raise ValueError(f"Port {port} out of range 0-65535")
+        return port
+
+    # ===== single ports =====
+    def add(self, port):
+        self._bits |= 1 << self._check(port)
+
+    def discard(self, port):
+        self._bits &= ~(1 << self._check(port))
+
+    def add_range(self, start, end):
+        self._bits |= PortSet.from_range(start, end)._bits
+
+    def discard_range(self, start, end):
+        self._bits &= ~PortSet.from_range(start, end)._bits
+
+    def __contains__(self, port):
+        return 0 <= port < self.SIZE and (self._bits >> port) & 1 == 1
+
+    # ===== set algebra =====
+    def __or__(self, other):
+        return PortSet.from_bits(self._bits | other._bits)
+
+    def __and__(self, other):
+        return PortSet.from_bits(self._bits & other._bits)
+
+    def __sub__(self, other):
+        return PortSet.from_bits(self._bits & ~other._bits)
+
+    def __xor__(self, other):
+        return PortSet.from_bits(self._bits ^ other._bits)
+
+    def __ior__(self, other):
+        self._bits |= other._bits
+        return self
+
+    def __iand__(self, other):
+        self._bits &= other._bits
+        return self
+
+    def __isub__(self, other):
+        self._bits &= ~other._bits
+        return self
+
+    def __eq__(self, other):
+        return isinstance(other, PortSet) and self._bits == other._bits
+
+    def __hash__(self):
+        return hash(self._bits)
+
+    def __len__(self):
+        return bin(self._bits).count("1")
+
+    def __bool__(self):
+        return self._bits != 0
+
+    def copy(self):
+        return PortSet.from_bits(self._bits)
+
+    # ===== walking =====
+    def _bit_string(self):
+        # index i of the returned string is port i
+        return format(self._bits, f"0{self.SIZE}b")[::-1]
+
+    def ranges(self):
+        """Yield (start, end) inclusive runs, ascending."""
+        for match in _ONES_RUN.finditer(self._bit_string()):
+            yield match.start(), match.end() - 1
+
+    def __iter__(self):
+        for start, end in self.ranges():
+            yield from range(start, end + 1)
+
+    def to_list(self):
+        return list(self)
+
+    def to_aggregate(self):
+        return [str(start) if start == end else f"{start}-{end}" for start, end in self.ranges()]
+
+    def first_fit(self, size, start=1, end=SIZE - 1):
+        """First port p in [start, end] with p .. p+size-1 all in the set, -1 if none."""
+        if size < 1:
+            raise ValueError("size must be >= 1")
+        idx = self._bit_string().find("1" * size, start, end + 1)
+        return idx
+
+    def __repr__(self):
+        agg = self.to_aggregate()
+        shown = ",".join(agg[:8]) + (",..." if len(agg) > 8 else "")
+        return f"PortSet({shown})"
+
+
 def get_port_from_str(addr_str):
     addr_str = str(addr_str).strip()
     if addr_str.isdigit():
@@ -33,14 +188,50 @@ def is_port_used(port):
 
     return ipv6_used
 
-def find_available_ports(start, end):
-    """Scan ports from `start` to `end` inclusive, and return list of available ports."""
-    available = []
-    for port in range(start, end + 1):
-        if not is_port_used(port):
-            available.append(port)
+PROC_NET_TCP = ("/proc/net/tcp", "/proc/net/tcp6")
+PROC_NET_UDP = ("/proc/net/udp", "/proc/net/udp6")
+
+def read_used_ports(include_udp=True):
+    """
+    Read /proc/net tables once and return a PortSet of local ports held by any socket,
+    on any address, in any state (LISTEN, ESTABLISHED, TIME_WAIT... all block a plain bind).
+    Tables that don't exist (no IPv6, not Linux) are skipped.
+    """
+    tables = PROC_NET_TCP + PROC_NET_UDP if include_udp else PROC_NET_TCP
+    used = 0
+    for table in tables:
+        try:
+            with open(table, "r") as f:
+                f.readline()  # header
+                for line in f:
+                    # "  0: 0100007F:1F90 00000000:0000 0A ..." -> local_address is field 1, port in hex
+                    local = line.split(None, 2)[1]
+                    used |= 1 << int(local[local.rindex(":") + 1:], 16)
+        except (FileNotFoundError, PermissionError):
+            continue
+    return PortSet.from_bits(used)
+
+def find_available_portset(start, end, method="bind", verify=False, include_udp=True):
+    """
+    Scan ports from `start` to `end` inclusive, and return a PortSet of available ports.
+    method="bind": try to bind every port (2 sockets per port, slow on big ranges).
+    method="proc": one pass over /proc/net/{tcp,tcp6,udp,udp6}, then one bitmap difference.
+    verify=True:   with method="proc", bind-probe the ports /proc said are free.
+    """
+    if method == "bind":
+        return PortSet(port for port in range(start, end + 1) if not is_port_used(port))
+    if method != "proc":
+        raise ValueError(f"Unknown scan method {method}, use 'bind' or 'proc'")
+
+    available = PortSet.from_range(start, end) - read_used_ports(include_udp=include_udp)
+    if verify:
+        available = PortSet(port for port in available if not is_port_used(port))
     return available
 
+def find_available_ports(start, end, method="bind", verify=False, include_udp=True):
+    """Scan ports from `start` to `end` inclusive, and return list of available ports."""
+    return find_available_portset(start, end, method=method, verify=verify, include_udp=include_udp).to_list()
+
 def aggregate_ports(ports):
     """
     Take a list of port numbers and return a list of strings where consecutive
@@ -48,35 +239,9 @@ def aggregate_ports(ports):
     Example: [3001,3004,3009,3010,3011,3995,3997,3998,3999]
              -> ['3001','3004','3009-3011','3995','3997','3998-3999']
     """
-    if not ports:
-        return []
-
-    ports = sorted(set(int(p) for p in ports))
-    result = []
-
-    start = prev = ports[0]
-    for p in ports[1:]:
-        if p == prev + 1:
-            # still in a consecutive run
-            prev = p
-            continue
-
-        # run ended at prev; emit it
-        if start == prev:
-            result.append(str(start))
-        else:
-            result.append(f"{start}-{prev}")
-
-        # start a new run
-        start = prev = p
-
-    # emit the final run
-    if start == prev:
-        result.append(str(start))
-    else:
-        result.append(f"{start}-{prev}")
-
-    return result
+    if not isinstance(ports, PortSet):
+        ports = PortSet(ports)
+    return ports.to_aggregate()
 
 
 def parse_port_range(arg):
@@ -93,27 +258,32 @@ def parse_port_range(arg):
     return start, end
 
 def main():
-    if len(sys.argv) > 1 and sys.argv[1] == "scan":
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    flags = {a for a in sys.argv[1:] if a.startswith("--")}
+    method = "proc" if "--proc" in flags else "bind"
+    verify = "--verify" in flags
+
+    if args and args[0] == "scan":
         # Mode 1: preserve original behavior — count across all ports
-        if len(sys.argv) == 2:
-            ports = len(find_available_ports(1, 65535))
+        if len(args) == 1:
+            ports = len(find_available_portset(1, 65535, method=method, verify=verify))
             print(f"{ports} available ports")
         # Mode 2: scan a specific range and print count + aggregated list
-        elif len(sys.argv) >= 3 and '-' in sys.argv[2]:
+        elif len(args) >= 2 and '-' in args[1]:
             try:
-                start, end = parse_port_range(sys.argv[2])
+                start, end = parse_port_range(args[1])
             except ValueError as e:
                 print(f"Error: {e}")
                 sys.exit(1)
-            available = find_available_ports(start, end)
-            agg = aggregate_ports(available)
+            available = find_available_portset(start, end, method=method, verify=verify)
+            agg = available.to_aggregate()
             print(f"{len(available)} available ports")
             if agg:
                 print("\n".join(agg))
         else:
             print("Usage:")
-            print("  python3 l4_port.py scan")
-            print("  python3 l4_port.py scan <start-end>")
+            print("  python3 l4_port.py scan [--proc [--verify]]")
+            print("  python3 l4_port.py scan <start-end> [--proc [--verify]]")
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,218 @@
+import fcntl
+import json
+import os
+import time
+import uuid
+from contextlib import contextmanager
+
+from DogeOpsPy.linux.l4_port import PortSet, is_port_used, read_used_ports
+
+# =============================================================================
+# PortAllocatorV1 — Race-free local port reservations (user guide)
+# =============================================================================
+# Many deploy processes on one host pick ports from the same range. Every reservation
+# happens under an flock() on <state_dir>/ports.lock, and lands in a shared JSON table
+# <state_dir>/ports.json, so two processes can never hand out the same port.
+#
+# -----------------------------------------------------------------------------
+# Init Options:
+#   start, end.    # Port range this allocator hands out (inclusive)
+#   state_dir.     # Where lock + table live, all cooperating processes must share it
+#   default_ttl.   # Lease lifetime (sec) when allocate() isn't given one; 0 = never expires
+#   scan_ttl.      # How long (sec) the /proc/net used-port snapshot is trusted
+#   owner.         # Free text stored with every lease (default "<hostname>:<pid>")
+#
+# -----------------------------------------------------------------------------
+# Methods:
+# instance.allocate(size=1, ttl=None).       # First-fit `size` contiguous ports -> PortLease
+# instance.reserve(port, size=1, ttl=None).  # Exactly these ports or ValueError
+# instance.renew(lease, ttl=None).           # Push expiry forward
+# instance.release(lease).                   # Give ports back
+# with instance.lease(size=1) as lease:      # allocate() + release() on exit
+# instance.leases().                         # Snapshot of live leases
+#
+# -----------------------------------------------------------------------------
+# QuickStart:
+# allocator = PortAllocatorV1(start=20000, end=29999, default_ttl=600)
+# lease = allocator.allocate(size=2)
+# print(lease.start, lease.end)    # e.g. 20000 20001
+# allocator.release(lease)
+#
+# -----------------------------------------------------------------------------
+# NOTES:
+# 1) The free map is cached in memory and patched on every change; it is only rebuilt when
+#    another process rewrote the table, and /proc/net is only re-read every scan_ttl.
+# 2) Picked ports are still bind-probed before they are handed out, a port grabbed by
+#    something outside the allocator since the last scan is skipped.
+# 3) A lease is a promise between cooperating processes, it does not hold the socket.
+#    Bind soon, or renew before the TTL runs out.
+
+
+class PortLease:
+    __slots__ = ("token", "start", "end", "owner", "expires")
+
+    def __init__(self, token, start, end, owner="", expires=0.0):
+        self.token = token
+        self.start = start
+        self.end = end
+        self.owner = owner
+        self.expires = expires
+
+    @property
+    def ports(self):
+        return list(range(self.start, self.end + 1))
+
+    def expired(self, now=None):
+        return bool(self.expires) and self.expires <= (now if now is not None else time.time())
+
+    def to_dict(self):
+        return {"start": self.start, "end": self.end, "owner": self.owner, "expires": self.expires}
+
+    @classmethod
+    def from_dict(cls, token, d):
+        return cls(token, int(d["start"]), int(d["end"]), d.get("owner", ""), float(d.get("expires", 0)))
+
+    def __repr__(self):
+        return f"PortLease({self.start}-{self.end}, owner={self.owner!r}, expires={self.expires:.0f})"
+
+
+class PortAllocatorV1:
+    def __init__(self, start=20000, end=29999, state_dir="/tmp/doge_ports", default_ttl=600, scan_ttl=5,
+                 owner=None):
+        # INPUT
+        self.range = PortSet.from_range(start, end)
+        self.state_dir = state_dir
+        self.default_ttl = default_ttl
+        self.scan_ttl = scan_ttl
+        self.owner = owner or f"{os.uname().nodename}:{os.getpid()}"
+
+        # DataStructures
+        os.makedirs(self.state_dir, exist_ok=True)
+        self._lock_path = os.path.join(self.state_dir, "ports.lock")
+        self._table_path = os.path.join(self.state_dir, "ports.json")
+        self._table_raw = b""  # table bytes behind the cached map below
+        self._leases = {}  # token -> PortLease
+        self._reserved = PortSet()
+        self._system_used = PortSet()
+        self._system_scanned_at = 0.0
+
+    # ===== public =====
+    def allocate(self, size=1, ttl=None):
+        with self._locked():
+            free = self._free_ports()
+            probe_from = self._first_port()
+            while True:
+                start = free.first_fit(size, probe_from)
+                if start < 0:
+                    raise RuntimeError(f"PortAllocatorV1::No {size} contiguous free ports left")
+                busy = [port for port in range(start, start + size) if is_port_used(port)]
+                if not busy:
+                    return self._add_lease(start, start + size - 1, ttl)
+                # Taken outside the allocator since the last scan, remember and keep looking
+                for port in busy:
+                    self._system_used.add(port)
+                    free.discard(port)
+                probe_from = busy[-1] + 1
+
+    def reserve(self, port, size=1, ttl=None):
+        if size < 1:
+            raise ValueError("size must be >= 1")
+        wanted = PortSet.from_range(port, port + size - 1)
+        with self._locked():
+            if (wanted - self._free_ports()) or any(is_port_used(p) for p in range(port, port + size)):
+                raise ValueError(f"PortAllocatorV1::Ports {port}-{port + size - 1} are not free")
+            return self._add_lease(port, port + size - 1, ttl)
+
+    def renew(self, lease, ttl=None):
+        with self._locked():
+            current = self._leases.get(lease.token)
+            if current is None:
+                raise KeyError(f"PortAllocatorV1::Lease {lease!r} is gone (expired or released)")
+            current.expires = self._expiry(ttl)
+            lease.expires = current.expires
+            self._save()
+        return lease
+
+    def release(self, lease):
+        with self._locked():
+            if self._leases.pop(lease.token, None) is None:
+                return False
+            self._reserved.discard_range(lease.start, lease.end)
+            self._save()
+        return True
+
+    @contextmanager
+    def lease(self, size=1, ttl=None):
+        lease = self.allocate(size=size, ttl=ttl)
+        try:
+            yield lease
+        finally:
+            self.release(lease)
+
+    def leases(self):
+        with self._locked():
+            return list(self._leases.values())
+
+    # ===== internals, call with the lock held =====
+    @contextmanager
+    def _locked(self):
+        with open(self._lock_path, "a") as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                self._load()
+                if self._expire():
+                    self._save()
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _load(self):
+        try:
+            with open(self._table_path, "rb") as fp:
+                raw = fp.read()
+        except FileNotFoundError:
+            raw = b""
+        if raw == self._table_raw:
+            return  # nobody else touched it, cached map is current
+        table = json.loads(raw) if raw else {}
+        self._leases = {token: PortLease.from_dict(token, d) for token, d in table.get("leases", {}).items()}
+        self._reserved = PortSet()
+        for lease in self._leases.values():
+            self._reserved.add_range(lease.start, lease.end)
+        self._table_raw = raw
+
+    def _save(self):
+        raw = json.dumps({"leases": {token: lease.to_dict() for token, lease in self._leases.items()}}).encode()
+        tmp_path = f"{self._table_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as fp:
+            fp.write(raw)
+        os.replace(tmp_path, self._table_path)  # readers see old or new table, never half of one
+        self._table_raw = raw
+
+    def _expire(self):
+        now = time.time()
+        expired = [lease for lease in self._leases.values() if lease.expired(now)]
+        for lease in expired:
+            del self._leases[lease.token]
+            self._reserved.discard_range(lease.start, lease.end)
+        return bool(expired)
+
+    def _free_ports(self):
+        if time.time() - self._system_scanned_at > self.scan_ttl:
+            self._system_used = read_used_ports()
+            self._system_scanned_at = time.time()
+        return self.range - self._reserved - self._system_used
+
+    def _first_port(self):
+        return next(self.range.ranges(), (0, 0))[0]
+
+    def _expiry(self, ttl):
+        ttl = self.default_ttl if ttl is None else ttl
+        return time.time() + ttl if ttl else 0.0
+
+    def _add_lease(self, start, end, ttl):
+        lease = PortLease(uuid.uuid4().hex, start, end, self.owner, self._expiry(ttl))
+        self._leases[lease.token] = lease
+        self._reserved.add_range(start, end)
+        self._save()
+        return lease
@@ -1,13 +1,26 @@
-import base64
+import io
 import re
+import select
+import shlex
 import sys
 import time
+import uuid
 
-import paramiko
 import os
-import os.path as p
+
+from DogeOpsPy.linux.exec_cache import looks_like_error, shell_cacheable
+from DogeOpsPy.linux import transfer
+from DogeOpsPy.profiling import trace
 
 ERROR_TAG = "!==DOGE_SSH_EXEC_ERROR==!\n"
+_ANSI_ESCAPE = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
+
+
+def _paramiko():
+    # paramiko + its crypto stack outweighs everything else this module imports: loaded on
+    # the first connect, CLIs that only parse configs or probe ports never pay for it
+    import paramiko
+    return paramiko
 
 # Author DevOpsDoge
 
@@ -24,10 +37,14 @@ ERROR_TAG = "!==DOGE_SSH_EXEC_ERROR==!\n"
 #     print(conn.exec("sudo docker ps -a"))
 #     print(conn.exec("sudo docker ps -a"))
 #     print(conn.exec("sudo docker ps -a"))
+#     for rc, out in conn.exec_many(["uptime", "df -h", "sudo docker ps -a"]):  # one round trip
+#         print(rc, out)
 
 class BastionJumpSSH:
     END=">><END><<"
-    def __init__(self, bastion_ip, bastion_user, key_path, target_ip, target_user, timeout=None, mute_warnings=False):
+    HEREDOC_END="__DOGE_EOF__"
+    def __init__(self, bastion_ip, bastion_user, key_path, target_ip, target_user, timeout=None, mute_warnings=False,
+                 exec_cache=None):
         self.bastion_ip = bastion_ip
         self.bastion_user = bastion_user
         self.key_path = os.path.expanduser(key_path)
@@ -35,12 +52,16 @@ class BastionJumpSSH:
         self.target_user = target_user
         self.timeout = timeout
         self.mute_warnings = mute_warnings
+        self.exec_cache = exec_cache  # exec_cache.ExecCacheV1, shared by every connection that should see its results
 
         self.ssh = None
         self.channel = None
 
+    @trace.traced("ssh.connect")
     def __enter__(self):
         # Connect to bastion
+        trace.current().set(host=self.bastion_ip, target=self.target_ip)
+        paramiko = _paramiko()
         self.ssh = paramiko.SSHClient()
         self.ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
         self.ssh.connect(
@@ -70,14 +91,26 @@ class BastionJumpSSH:
     @staticmethod
     def strip_ansi_sequences(s):
         # Remove ANSI escape sequences
-        ansi_escape = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
-        return ansi_escape.sub('', s)
+        return _ANSI_ESCAPE.sub('', s)
 
     def ssh_init(self):
         self.channel.send(f'export PS1="{self.END}"\n')
         self._read(mute_warnings=True)
 
     def exec(self, command, timeout_override=None):
+        if self.exec_cache is None:
+            return self._exec(command, timeout_override)
+        if shell_cacheable(command):
+            # No rc here: output that reads like an error isn't kept, see exec_cache.py NOTES 5
+            return self.exec_cache.call(self.target_ip, self.target_user, command,
+                                        lambda: self._exec(command, timeout_override),
+                                        keep=lambda output: not looks_like_error(output))
+        try:
+            return self._exec(command, timeout_override)
+        finally:
+            self.exec_cache.invalidate_for(self.target_ip, command)
+
+    def _exec(self, command, timeout_override=None):
         timeout = timeout_override if timeout_override else self.timeout
         self.channel.send(command + "\n")
         result = self.strip_ansi_sequences(self._read(timeout=timeout))
@@ -86,16 +119,142 @@ class BastionJumpSSH:
             result = result.lstrip()
         return result
 
-    def write_file(self, file_path, muti_lines_str, permission_number="644"):
-        file_path = p.normpath(file_path)
-        file_dirname = p.dirname(file_path)
-        result = list()
-        result.append(self.exec(f"mkdir -p {file_dirname}"))
-        muti_lines_str_b64 = base64.b64encode(muti_lines_str.encode()).decode()
-        result.append(self.exec(f"echo '{muti_lines_str_b64}' | base64 -d > {file_path}"))
-        result.append(self.exec(f"chmod {permission_number} {file_path}"))
-        return result
-
+    def exec_many(self, commands, timeout_override=None):
+        # Whole batch goes out in one write and comes back behind one prompt: 1 RTT regardless of batch size.
+        # Markers are built by printf, so the echoed command line never matches them.
+        # Returns [(rc, output), ...] in order; rc is None if that command's markers never showed up.
+        timeout = timeout_override if timeout_override else self.timeout
+        token = uuid.uuid4().hex[:12]
+        lines = ["{"]
+        for idx, command in enumerate(commands):
+            lines.append(f"printf '__DOGE_%s_%s_%d__\\n' B {token} {idx}")
+            lines.append(command)
+            lines.append(f"printf '\\n__DOGE_%s_%s_%d=%d__\\n' E {token} {idx} $?")
+        lines.append("}")
+        try:
+            self.channel.sendall(("\n".join(lines) + "\n").encode())
+            output = self.strip_ansi_sequences(self._read(timeout=timeout))
+        finally:
+            if self.exec_cache is not None:
+                for command in commands:
+                    self.exec_cache.invalidate_for(self.target_ip, command)
+
+        results = [(None, "")] * len(commands)
+        marker = re.compile(rf"__DOGE_B_{token}_(\d+)__\n(.*?)\n__DOGE_E_{token}_(\d+)=(\d+)__", re.S)
+        for match in marker.finditer(output):
+            idx = int(match.group(1))
+            if idx == int(match.group(3)) and idx < len(results):
+                results[idx] = (int(match.group(4)), match.group(2).rstrip())
+        return results
+
+    def write_file(self, file_path, muti_lines_str, permission_number="644", compress=False, skip_unchanged=False):
+        # Same 3 slots as before (mkdir, write, chmod); they run as one group now, so the
+        # remote output of all three lands in the write slot
+        written, output = self._upload_group([(file_path, muti_lines_str)], permission_number, compress, skip_unchanged)
+        return ["", output, ""]
+
+    def write_files(self, items, permission_number="644", compress=False, skip_unchanged=False):
+        # items: [(remote_path, content), ...] or {remote_path: content}, content is str / bytes / transfer.LocalFile
+        written, output = self._upload_group(items, permission_number, compress, skip_unchanged)
+        if output and not self.mute_warnings:
+            print(f"write_files() remote said: {output}", file=sys.stderr)
+        return written
+
+    def upload(self, local_path, remote_path, permission_number="644", compress=False, skip_unchanged=False):
+        return self.write_files([(remote_path, transfer.LocalFile(local_path))], permission_number, compress,
+                                skip_unchanged)
+
+    def _upload_group(self, items, permission_number, compress, skip_unchanged):
+        # All files go in ONE shell group of heredocs, so the whole batch costs one prompt round trip.
+        # Terminal echo is off meanwhile, the base64 body never comes back through _read().
+        items = transfer.normalize_items(items)
+        written = {path: False for path, _ in items}
+        remote_hashes = {}
+        if skip_unchanged:
+            # Internal probe, not through exec(): the cache would refuse it and drop the host's results
+            remote_hashes = transfer.parse_sha256sum(self._exec(transfer.sha256sum_cmd(written)))
+
+        todo = []
+        for path, content in items:
+            with transfer.open_content(content) as buf:
+                if skip_unchanged and remote_hashes.get(path) == transfer.sha256_of(buf):
+                    continue
+            todo.append((path, content))
+        if not todo:
+            return written, ""
+
+        decoder = " | gunzip" if compress else ""
+        self.exec("stty -echo; export PS2=''")
+        done = False
+        try:
+            pending = bytearray(b"{\n")
+            mkdir = transfer.mkdir_cmd([path for path, _ in todo])
+            if mkdir:
+                pending += mkdir.encode() + b"\n"
+            for path, content in todo:
+                quoted = shlex.quote(path)
+                pending += f"base64 -d <<'{self.HEREDOC_END}'{decoder} > {quoted}\n".encode()
+                with transfer.open_content(content) as buf:
+                    chunks = transfer.iter_gzip(buf) if compress else transfer.iter_chunks(buf)
+                    for line in transfer.iter_b64_lines(chunks):
+                        pending += line
+                        if len(pending) >= transfer.CHUNK_SIZE:
+                            self.channel.sendall(bytes(pending))
+                            pending.clear()
+                pending += f"{self.HEREDOC_END}\nchmod {permission_number} {quoted}\n".encode()
+                written[path] = True
+            pending += b"}\n"
+            self.channel.sendall(bytes(pending))
+            output = self.strip_ansi_sequences(self._read(timeout=self.timeout))
+            done = True
+        finally:
+            if not done:
+                # Failed mid-send: the shell still sits in the `{` group / a heredoc and would take the
+                # next line as data. bash runs nothing of the group before its `}`, so Ctrl-C drops it
+                # whole (no half-written file), or stops it if it was already running; then the prompt
+                self.channel.send("\x03")
+                self.drain(timeout=self.timeout or 10)
+            self.exec("stty echo")
+            if self.exec_cache is not None:
+                self.exec_cache.invalidate(host=self.target_ip)  # cached `cat` of these files is stale now
+        return written, output
+
+    def iter_exec(self, command, timeout=None, chunk_size=transfer.CHUNK_SIZE):
+        # Side channel: non-interactive ssh from the bastion, so output is raw bytes and never hits the PS1 scraper
+        if self.exec_cache is not None:
+            self.exec_cache.invalidate_for(self.target_ip, command)
+        channel = self.ssh.get_transport().open_session()
+        channel.exec_command(
+            f"ssh -o BatchMode=yes -o StrictHostKeyChecking=no {self.target_user}@{self.target_ip} {shlex.quote(command)}"
+        )
+        return ExecStream(channel, timeout=timeout, chunk_size=chunk_size)
+
+    def download(self, remote_path, dest, chunk_size=transfer.CHUNK_SIZE):
+        # dest: local path or writable buffer, returns bytes written
+        err = bytearray()
+        total = 0
+        stream = self.iter_exec(f"cat {shlex.quote(remote_path)}", timeout=self.timeout, chunk_size=chunk_size)
+        with transfer.open_sink(dest) as sink:
+            for name, chunk in stream:
+                if name == "stdout":
+                    sink.write(chunk)
+                    total += len(chunk)
+                else:
+                    err.extend(chunk)
+        if stream.rc != 0:
+            raise IOError(f"download {remote_path} failed rc={stream.rc}: {err.decode('utf-8', errors='replace')}")
+        return total
+
+    def read_file(self, remote_path):
+        buf = io.BytesIO()
+        self.download(remote_path, buf)
+        return buf.getvalue()
+
+    def tail(self, path, follow=True, lines=10):
+        return transfer.aiter_exec_lines(self, transfer.tail_cmd(path, follow, lines),
+                                         timeout=None if follow else self.timeout)
+
+    @trace.traced("ssh.read")
     def _read(self, timeout=None, timeout_raise=True, stop_endswith="", mute_warnings=False):
         buffer = bytearray()
         last_active = time.time()
@@ -119,6 +278,7 @@ class BastionJumpSSH:
                         break
 
                 time.sleep(0.1)
+        trace.current().set(bytes=len(buffer))
 
         # Get last reply
         replies = [reply.rstrip() for reply in decoded.split(stop_endswith) if reply.strip()]
@@ -142,6 +302,39 @@ class BastionJumpSSH:
         if self.ssh:
             self.ssh.close()
 
+class ExecStream:
+    """Iterates (stream_name, bytes) chunks of one remote command, stdout and stderr interleaved."""
+    CHUNK_SIZE = 32768
+
+    def __init__(self, channel, timeout=10, chunk_size=CHUNK_SIZE):
+        self.channel = channel
+        self.timeout = timeout
+        self.chunk_size = chunk_size
+        self.rc = None
+
+    def __iter__(self):
+        channel = self.channel
+        try:
+            while True:
+                if channel.recv_stderr_ready():
+                    yield "stderr", channel.recv_stderr(self.chunk_size)
+                elif channel.recv_ready():
+                    yield "stdout", channel.recv(self.chunk_size)
+                elif channel.eof_received or channel.closed:
+                    break
+                else:
+                    # Channel fileno wakes up on stdout data, stderr data and EOF alike
+                    readable, _, _ = select.select([channel], [], [], self.timeout)
+                    if not readable:
+                        raise TimeoutError(f"ExecStream no output in {self.timeout}s")
+            self.rc = channel.recv_exit_status()
+        finally:
+            channel.close()
+
+    def close(self):
+        self.channel.close()
+
+
 # =====================================用法===================================
 # from ssh import DirectSSH, ERROR_TAG
 # import os
@@ -167,21 +360,45 @@ class BastionJumpSSH:
 #         content = f.read()
 #     conn.write_file(remote_file, content)
 #
+#     # Big files / many files: mmap'd local reads, one reused SFTP session, pipelined writes
+#     conn.upload(local_file, remote_file)
+#     conn.write_files({"/etc/app/a.conf": "...", "/etc/app/b.conf": LocalFile("b.conf")}, skip_unchanged=True)
+#     conn.download("/var/log/syslog", "/tmp/syslog")   # or any writable buffer
+#     print(conn.read_file("/etc/os-release"))
+#
 #     # Timeout
 #     conn.exec(command="sleep 4", timeout=TIMEOUT)
+#
+#     # Streaming, stdout and stderr drained together, exit code kept
+#     rc, out, err = conn.exec_stream("journalctl -n 100000", on_stdout=sys.stdout.buffer.write, max_capture=0)
+#     stream = conn.iter_exec("docker logs app")
+#     for name, chunk in stream:
+#         print(name, len(chunk))
+#     print(stream.rc)
+#
+# # Read-only commands repeated across jobs/threads: one remote call per ttl, see exec_cache.py
+# cache = ExecCacheV1(ttl=10)
+# with DirectSSH(host=TARGET_HOST, user=TARGET_USER, key_path=TARGET_KEY, exec_cache=cache) as conn:
+#     print(conn.exec("sudo nginx -T"))
 
 
 class DirectSSH:
-    def __init__(self, host, user, key_path=None, password=None, port=22, timeout=10):
+    def __init__(self, host, user, key_path=None, password=None, port=22, timeout=10, compress=False, exec_cache=None):
         self.host = host
         self.user = user
         self.key_path = os.path.expanduser(key_path) if key_path else None
         self.password = password
         self.port = port
         self.timeout = timeout
+        self.compress = compress
+        self.exec_cache = exec_cache  # exec_cache.ExecCacheV1, shared by every connection that should see its results
         self.ssh = None
+        self._sftp = None
 
+    @trace.traced("ssh.connect")
     def __enter__(self):
+        trace.current().set(host=self.host)
+        paramiko = _paramiko()
         self.ssh = paramiko.SSHClient()
         self.ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
         self.ssh.connect(
@@ -191,32 +408,145 @@ class DirectSSH:
             key_filename=self.key_path,
             password=self.password,
             timeout=self.timeout,
+            compress=self.compress,
         )
         return self
 
     def exec(self, command, timeout=10):
-        stdin, stdout, stderr = self.ssh.exec_command(command)
-        stdout.channel.settimeout(timeout=timeout)
-        out = stdout.read().decode("utf-8", errors="replace")
-        err = stderr.read().decode("utf-8", errors="replace")
+        rc, out, err = self.exec_rc(command, timeout=timeout)
         if err:
             out += f"{ERROR_TAG}{err}"
         return out
 
-    def write_file(self, remote_path, content, permission="644"):
-        sftp = self.ssh.open_sftp()
+    def exec_rc(self, command, timeout=10, max_capture=None):
+        # Same as exec(), but keeps stdout/stderr apart and returns the real exit code
+        if self.exec_cache is not None and max_capture is None:
+            # exec() goes through here too; a failed command (rc != 0) isn't kept
+            return self.exec_cache.call(self.host, self.user, command,
+                                        lambda: self._exec_rc(command, timeout),
+                                        keep=lambda result: result[0] == 0)
+        return self._exec_rc(command, timeout, max_capture)
+
+    def _exec_rc(self, command, timeout=10, max_capture=None):
+        rc, out, err = self.exec_stream(command, timeout=timeout, max_capture=max_capture)
+        return rc, out.decode("utf-8", errors="replace"), err.decode("utf-8", errors="replace")
+
+    @trace.traced("ssh.exec")
+    def exec_stream(self, command, timeout=10, on_stdout=None, on_stderr=None, max_capture=None,
+                    chunk_size=ExecStream.CHUNK_SIZE):
+        # Drain stdout and stderr together, chunk callbacks get raw bytes.
+        # max_capture=None keeps everything, 0 keeps nothing (callbacks only), N keeps the last N bytes per stream.
+        captures = {"stdout": bytearray(), "stderr": bytearray()}
+        callbacks = {"stdout": on_stdout, "stderr": on_stderr}
+        stream = self.iter_exec(command, timeout=timeout, chunk_size=chunk_size)
+        for name, chunk in stream:
+            callback = callbacks[name]
+            if callback:
+                callback(chunk)
+            if max_capture == 0:
+                continue
+            buf = captures[name]
+            buf.extend(chunk)
+            if max_capture is not None and len(buf) > 2 * max_capture:
+                del buf[:-max_capture]  # trim rarely, amortized O(1) per byte
+        trace.current().set(host=self.host, rc=stream.rc)
+
+        out, err = captures["stdout"], captures["stderr"]
+        if max_capture:
+            del out[:-max_capture]
+            del err[:-max_capture]
+        return stream.rc, bytes(out), bytes(err)
+
+    def iter_exec(self, command, timeout=10, chunk_size=ExecStream.CHUNK_SIZE):
+        # for name, chunk in conn.iter_exec("journalctl -f -n 100"): ...  then read .rc
+        if self.exec_cache is not None:
+            self.exec_cache.invalidate_for(self.host, command)
+        return self._open_exec(command, timeout=timeout, chunk_size=chunk_size)
+
+    def _open_exec(self, command, timeout=10, chunk_size=ExecStream.CHUNK_SIZE):
+        channel = self.ssh.get_transport().open_session()
+        channel.exec_command(command)
+        return ExecStream(channel, timeout=timeout, chunk_size=chunk_size)
+
+    def sftp(self):
+        # One SFTP session per connection, reused by every transfer
+        if self._sftp is None:
+            self._sftp = self.ssh.open_sftp()
+        return self._sftp
+
+    def write_file(self, remote_path, content, permission="644", skip_unchanged=False):
+        written = self.write_files([(remote_path, content)], permission=permission, skip_unchanged=skip_unchanged)
+        return next(iter(written.values()))
+
+    def write_files(self, items, permission="644", skip_unchanged=False):
+        # items: [(remote_path, content), ...] or {remote_path: content}, content is str / bytes / transfer.LocalFile
+        # Returns {remote_path: True if written, False if skipped as unchanged}
+        items = transfer.normalize_items(items)
+        written = {path: False for path, _ in items}
+        remote_hashes = {}
+        if skip_unchanged:
+            # Internal probe, not through exec(): the cache would refuse it and drop the host's results.
+            # stderr (files that don't exist yet) is simply not read
+            stream = self._open_exec(transfer.sha256sum_cmd(written), timeout=self.timeout)
+            remote_hashes = transfer.parse_sha256sum(
+                b"".join(chunk for name, chunk in stream if name == "stdout").decode("utf-8", errors="replace"))
+
+        todo = []
+        for path, content in items:
+            with transfer.open_content(content) as buf:
+                if skip_unchanged and remote_hashes.get(path) == transfer.sha256_of(buf):
+                    continue
+            todo.append((path, content))
+        if not todo:
+            return written
+
+        # 确保目录存在可以用 exec("mkdir -p ...")，SFTP 本身没 mkdir -p
+        mkdir = transfer.mkdir_cmd([path for path, _ in todo])
+        if mkdir:
+            self.exec(mkdir)
+
+        sftp = self.sftp()
         try:
-            # 确保目录存在可以用 exec("mkdir -p ...")，SFTP 本身没 mkdir -p
-            dir_path = os.path.dirname(remote_path)
-            if dir_path:
-                self.exec(f"mkdir -p '{dir_path}'")
-
-            with sftp.file(remote_path, "w") as f:
-                f.write(content)
-            sftp.chmod(remote_path, int(permission, 8))
+            for path, content in todo:
+                with transfer.open_content(content) as buf, sftp.open(path, "wb") as f:
+                    f.set_pipelined(True)  # don't wait for an ack per write request
+                    for chunk in transfer.iter_chunks(buf):
+                        f.write(bytes(chunk))
+                sftp.chmod(path, int(permission, 8))
+                written[path] = True
         finally:
-            sftp.close()
+            if self.exec_cache is not None:
+                self.exec_cache.invalidate(host=self.host)  # cached `cat` of these files is stale now, even half written
+        return written
+
+    def upload(self, local_path, remote_path, permission="644", skip_unchanged=False):
+        return self.write_file(remote_path, transfer.LocalFile(local_path), permission, skip_unchanged)
+
+    def download(self, remote_path, dest, chunk_size=transfer.CHUNK_SIZE):
+        # dest: local path or writable buffer, returns bytes written
+        total = 0
+        with self.sftp().open(remote_path, "rb") as f, transfer.open_sink(dest) as sink:
+            f.prefetch()  # read requests go out ahead, no ack-per-chunk wait
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                sink.write(chunk)
+                total += len(chunk)
+        return total
+
+    def read_file(self, remote_path):
+        with self.sftp().open(remote_path, "rb") as f:
+            f.prefetch()
+            return f.read()
+
+    def tail(self, path, follow=True, lines=10):
+        return transfer.aiter_exec_lines(self, transfer.tail_cmd(path, follow, lines),
+                                         timeout=None if follow else self.timeout)
 
     def __exit__(self, exc_type, exc_val, exc_tb):
+        if self._sftp:
+            self._sftp.close()
+            self._sftp = None
         if self.ssh:
             self.ssh.close()
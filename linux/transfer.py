@@ -0,0 +1,248 @@
+import base64
+import hashlib
+import mmap
+import os
+import shlex
+import sys
+import threading
+import zlib
+from contextlib import contextmanager
+
+# =============================================================================
+# transfer — helpers shared by DirectSSH / BastionJumpSSH uploads
+# =============================================================================
+# Content handed to write_file()/write_files() can be:
+#   str                    # encoded as utf-8
+#   bytes / bytearray      # sent as is
+#   LocalFile(path)        # local file, memory-mapped, never read into a python bytes
+#
+# Nothing here touches the network, the SSH classes own the sessions.
+
+CHUNK_SIZE = 32768
+# Raw bytes per base64 line, multiple of 3 so lines join without padding. The lines are typed
+# into an interactive tty (BastionJumpSSH heredocs): 3040 chars, under the 4095 canonical-mode
+# line limit of non-readline shells (sh/dash)
+B64_LINE_RAW = 57 * 40
+
+
+class LocalFile:
+    def __init__(self, path):
+        self.path = os.path.expanduser(path)
+
+    def __repr__(self):
+        return f"LocalFile({self.path!r})"
+
+
+@contextmanager
+def open_content(content):
+    """Yield a buffer for `content` without copying local files into memory."""
+    if isinstance(content, LocalFile):
+        with open(content.path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                yield b""  # mmap refuses empty files
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                yield mm
+    elif isinstance(content, str):
+        yield content.encode("utf-8")
+    elif isinstance(content, (bytes, bytearray, memoryview)):
+        yield content
+    else:
+        raise TypeError(f"Upload content must be str, bytes or LocalFile, found [{type(content)}]")
+
+
+def sha256_of(buf):
+    return hashlib.sha256(buf).hexdigest()
+
+
+def iter_chunks(buf, chunk_size=CHUNK_SIZE):
+    view = memoryview(buf)
+    for i in range(0, len(view), chunk_size):
+        yield view[i:i + chunk_size]
+
+
+def iter_gzip(buf, chunk_size=CHUNK_SIZE):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 -> gzip container for remote gunzip
+    for chunk in iter_chunks(buf, chunk_size):
+        out = compressor.compress(chunk)
+        if out:
+            yield out
+    yield compressor.flush()
+
+
+def iter_b64_lines(chunks):
+    """Re-cut a byte stream into base64 lines of fixed size, suitable for a heredoc."""
+    pending = bytearray()
+    for chunk in chunks:
+        pending.extend(chunk)
+        cut = len(pending) - len(pending) % B64_LINE_RAW
+        for i in range(0, cut, B64_LINE_RAW):
+            yield base64.b64encode(pending[i:i + B64_LINE_RAW]) + b"\n"
+        del pending[:cut]
+    if pending:
+        yield base64.b64encode(pending) + b"\n"
+
+
+def sha256sum_cmd(paths):
+    # No 2>/dev/null: a redirect makes exec_cache treat it as a write, stderr lines don't parse anyway
+    return "sha256sum " + " ".join(shlex.quote(path) for path in paths)
+
+
+def parse_sha256sum(output):
+    """Parse `sha256sum a b c` output into {path: hexdigest}, missing files are just absent."""
+    hashes = {}
+    for line in output.splitlines():
+        parts = line.strip().split(None, 1)
+        if len(parts) == 2 and len(parts[0]) == 64:
+            hashes[parts[1].lstrip("*")] = parts[0]
+    return hashes
+
+
+def mkdir_cmd(paths):
+    dirs = sorted({os.path.dirname(path) for path in paths} - {""})
+    if not dirs:
+        return ""
+    return "mkdir -p " + " ".join(shlex.quote(d) for d in dirs)
+
+
+def normalize_items(items):
+    if isinstance(items, dict):
+        items = items.items()
+    return [(os.path.normpath(path), content) for path, content in items]
+
+
+# =============================================================================
+# Downloads / tail
+# =============================================================================
+# Destination handed to download() can be a local path or anything with .write(bytes)
+# (an open file, BytesIO, a socket wrapper ...). Chunks go straight to it.
+#
+# tail() is an async iterator of lines, the blocking paramiko read runs in its own thread
+# and hands lines over through a bounded queue, so a slow consumer pauses the remote read.
+#
+# QuickStart:
+# async for line in conn.tail("/var/log/nginx/error.log"):
+#     print(line)
+#
+# async for conn, line in tail_many([conn1, conn2, conn3], "/var/log/syslog"):
+#     print(conn.host, line)
+
+LINE_QUEUE_SIZE = 1024
+PUT_POLL = 0.5  # how often a pump thread blocked on a full queue checks the consumer is still there
+
+
+@contextmanager
+def open_sink(dest):
+    if hasattr(dest, "write"):
+        yield dest
+    else:
+        with open(os.path.expanduser(dest), "wb") as f:
+            yield f
+
+
+def tail_cmd(path, follow=True, lines=10):
+    return f"tail -n {int(lines)} {'-F ' if follow else ''}{shlex.quote(path)}"
+
+
+async def aiter_exec_lines(conn, command, timeout=None):
+    """Run `command` through conn.iter_exec() and yield decoded output lines as they arrive."""
+    import asyncio  # already loaded by whoever runs the loop, kept off the import path of ssh.py
+    from concurrent.futures import TimeoutError as PutTimeout
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue(maxsize=LINE_QUEUE_SIZE)
+    stopped = threading.Event()
+    done = object()
+    stream = conn.iter_exec(command, timeout=timeout)
+
+    def put(item):
+        if stopped.is_set():
+            return
+        try:
+            future = asyncio.run_coroutine_threadsafe(queue.put(item), loop)
+        except RuntimeError:
+            stopped.set()  # event loop is gone, nobody is listening
+            return
+        while True:
+            try:
+                future.result(PUT_POLL)
+                return
+            except PutTimeout:
+                # Consumer gone without closing the generator: loop stopped / closed under us
+                if stopped.is_set() or loop.is_closed() or not loop.is_running():
+                    if not loop.is_closed():
+                        future.cancel()
+                    stopped.set()
+                    return
+            except Exception:
+                stopped.set()  # put() cancelled with its loop
+                return
+
+    def pump():
+        pending = bytearray()
+        try:
+            for _, chunk in stream:
+                pending.extend(chunk)
+                cut = pending.rfind(b"\n")
+                if cut < 0:
+                    continue
+                for line in bytes(pending[:cut]).split(b"\n"):
+                    put(line)
+                del pending[:cut + 1]
+                if stopped.is_set():
+                    break
+            if pending:
+                put(bytes(pending))
+        except Exception as e:
+            put(e)
+        finally:
+            put(done)
+            if stopped.is_set():
+                stream.close()  # don't keep the channel open for nobody
+
+    threading.Thread(target=pump, name=f"tail:{command}", daemon=True).start()
+    try:
+        while True:
+            item = await queue.get()
+            if item is done:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item.decode("utf-8", errors="replace").rstrip("\r")
+    finally:
+        stopped.set()
+        stream.close()
+        while not queue.empty():  # unblock a pump stuck on a full queue
+            queue.get_nowait()
+
+
+async def tail_many(conns, path, follow=True, lines=10):
+    """Merge tail() of many connections, yields (conn, line) in arrival order."""
+    import asyncio
+    queue = asyncio.Queue(maxsize=LINE_QUEUE_SIZE)
+    done = object()
+
+    async def follow_one(conn):
+        try:
+            async for line in conn.tail(path, follow=follow, lines=lines):
+                await queue.put((conn, line))
+        except Exception as e:
+            print(f"tail_many() {getattr(conn, 'host', None) or getattr(conn, 'target_ip', conn)} stopped: {e}", file=sys.stderr)
+        await queue.put((conn, done))
+
+    tasks = [asyncio.create_task(follow_one(conn)) for conn in conns]
+    running = len(tasks)
+    try:
+        while running:
+            conn, line = await queue.get()
+            if line is done:
+                running -= 1
+                continue
+            yield conn, line
+    finally:
+        for task in tasks:
+            task.cancel()
+        while not all(task.done() for task in tasks):
+            while not queue.empty():  # unblock followers stuck on a full queue
+                queue.get_nowait()
+            await asyncio.sleep(0)
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,82 @@
+# tcp_scan_demo.py
+# ConnectScannerV1 against listeners on 127.0.0.1: open ports, a closed port, a resolver
+# that hangs / answers nothing, and a consumer that stops early.
+# python -m DogeOpsPy.networks.demo.tcp_scan_demo
+import asyncio
+import contextlib
+import socket
+import time
+
+from DogeOpsPy.networks.tcp_scan import ConnectScannerV1
+
+
+def listeners(n):
+    socks = []
+    for _ in range(n):
+        sock = socket.socket()
+        sock.bind(("127.0.0.1", 0))
+        sock.listen(128)
+        socks.append(sock)
+    return socks
+
+
+def closed_port():
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()  # nothing listens there anymore
+    return port
+
+
+async def main():
+    loop = asyncio.get_running_loop()
+    real_getaddrinfo = loop.getaddrinfo
+
+    async def fake_getaddrinfo(host, port, **kwargs):
+        if host == "slow.resolver.test":
+            await asyncio.sleep(3600)
+        if host == "empty.resolver.test":
+            return []
+        return await real_getaddrinfo(host, port, **kwargs)
+
+    loop.getaddrinfo = fake_getaddrinfo
+
+    open_socks = listeners(5)
+    open_targets = [f"127.0.0.1:{s.getsockname()[1]}" for s in open_socks]
+    closed = f"127.0.0.1:{closed_port()}"
+    scanner = ConnectScannerV1(concurrency=10, timeout=1)
+
+    t0 = time.monotonic()
+    results = {r.target: r for r in await scanner.scan_all(
+        open_targets + [closed, "slow.resolver.test:80", "empty.resolver.test:80", "no-port"])}
+    for r in results.values():
+        print(r)
+    assert all(results[t].ok for t in open_targets)
+    assert not results[closed].ok and results[closed].error
+    assert results["slow.resolver.test:80"].error == "timeout in 1s"
+    assert results["empty.resolver.test:80"].error == "no address for empty.resolver.test"
+    assert not results["no-port"].ok
+    print(f"open/closed/resolver cases: {time.monotonic() - t0:.2f}s")
+
+    # Early break: closing the generator stops every worker, nothing is left running
+    for _ in range(20):
+        seen = 0
+        async with contextlib.aclosing(scanner.scan(open_targets * 200)) as results:
+            async for _ in results:
+                seen += 1
+                if seen == 3:
+                    break
+        leftover = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        assert seen == 3 and not leftover, leftover
+    print("early break: 3 results taken, no worker left running (x20)")
+
+    # Early break without closing: the loop finalizes the generator later, must not hang
+    async for _ in scanner.scan(open_targets * 200):
+        break
+
+    for sock in open_socks:
+        sock.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,182 @@
+import asyncio
+import socket
+import sys
+import time
+
+# =============================================================================
+# ConnectScannerV1 — Async TCP reachability scanner (user guide)
+# =============================================================================
+# One event loop, non-blocking sockets via loop.sock_connect(), no thread per probe.
+# `concurrency` worker coroutines pull targets from a shared iterator, so a list of
+# 100k targets never turns into 100k pending tasks.
+#
+# -----------------------------------------------------------------------------
+# Init Options:
+#   concurrency.   # Max connects in flight, across all targets
+#   timeout.       # Per-target connect timeout (sec)
+#
+# -----------------------------------------------------------------------------
+# Methods:
+# async for result in instance.scan(targets):   # ConnectResult per target, in completion order
+# await instance.check(target).                 # One target
+#
+# Targets: "10.0.3.7:8080", "[::1]:443", "backend.local:80" or (host, port) tuples.
+#
+# -----------------------------------------------------------------------------
+# QuickStart (python -m DogeOpsPy.networks.demo.tcp_scan_demo runs it against local listeners):
+# scanner = ConnectScannerV1(concurrency=1000, timeout=2)
+# targets = targets_from_server_dicts(nginx.conf_to_server_dicts(conf_lines))
+# async for r in scanner.scan(targets):
+#     print(r.target, r.ok, f"{r.latency * 1000:.1f}ms", r.error)
+#
+# -----------------------------------------------------------------------------
+# NOTES:
+# 1) Hostnames go through loop.getaddrinfo() (the default executor), plain IPs never do.
+#    `timeout` covers resolve + connect.
+# 2) A bad target (no port, unix socket ...) yields ok=False with an error, it never raises.
+
+
+class ConnectResult:
+    __slots__ = ("target", "host", "port", "ok", "latency", "error")
+
+    def __init__(self, target, host="", port=-1, ok=False, latency=0.0, error=""):
+        self.target = target
+        self.host = host
+        self.port = port
+        self.ok = ok
+        self.latency = latency
+        self.error = error
+
+    def to_dict(self):
+        return {k: getattr(self, k) for k in self.__slots__}
+
+    def __repr__(self):
+        return f"ConnectResult({self.target!r}, ok={self.ok}, latency={self.latency * 1000:.1f}ms, error={self.error!r})"
+
+
+def split_target(target):
+    """ "1.2.3.4:80" / "[::1]:80" / ("host", 80) -> (host, port), ValueError if there is no usable port."""
+    if isinstance(target, (tuple, list)):
+        host, port = target
+        return str(host), int(port)
+    target = str(target).strip()
+    if "://" in target:
+        target = target.split("://", 1)[1].split("/", 1)[0]
+    if target.startswith("["):
+        host, _, rest = target[1:].partition("]")
+        port = rest.lstrip(":")
+    else:
+        host, _, port = target.rpartition(":")
+    if not host or not port.isdigit() or not 0 < int(port) < 65536:
+        raise ValueError(f"No host:port in target {target!r}")
+    return host, int(port)
+
+
+def targets_from_server_dicts(server_dicts):
+    """Unique proxy targets of ingress conf_to_server_dicts() output that look like host:port."""
+    seen = set()
+    targets = []
+    for server in server_dicts:
+        for target in server.get("proxy", []):
+            if target in seen or str(target).startswith("unix:"):
+                continue
+            seen.add(target)
+            try:
+                split_target(target)
+            except ValueError:
+                continue
+            targets.append(target)
+    return targets
+
+
+class ConnectScannerV1:
+    def __init__(self, concurrency=500, timeout=3):
+        # INPUT
+        self.concurrency = max(1, int(concurrency))
+        self.timeout = timeout
+
+    async def check(self, target):
+        loop = asyncio.get_running_loop()
+        result = ConnectResult(target)
+        try:
+            result.host, result.port = split_target(target)
+        except (ValueError, TypeError) as e:
+            result.error = str(e)
+            return result
+
+        t0 = time.monotonic()
+        socks = []
+        try:
+            # timeout covers name resolution too, a slow resolver can't hold a worker forever
+            await asyncio.wait_for(self._connect(loop, result.host, result.port, socks), self.timeout)
+            result.ok = True
+        except asyncio.TimeoutError:
+            result.error = f"timeout in {self.timeout}s"
+        except OSError as e:
+            result.error = e.strerror or str(e)
+        finally:
+            result.latency = time.monotonic() - t0
+            for sock in socks:
+                sock.close()
+        return result
+
+    async def _connect(self, loop, host, port, socks):
+        family, address = await self._resolve(loop, host, port)
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        socks.append(sock)  # closed by check(), timeout or not
+        sock.setblocking(False)
+        await loop.sock_connect(sock, address)
+
+    async def scan(self, targets):
+        targets = iter(targets)
+        queue = asyncio.Queue(maxsize=self.concurrency)
+        done = object()
+        stopping = []
+
+        async def worker():
+            try:
+                for target in targets:  # shared iterator, every target is taken exactly once
+                    if stopping:
+                        break
+                    await queue.put(await self.check(target))
+            except Exception as e:
+                print(f"ConnectScannerV1 worker died: {e}", file=sys.stderr)
+            await queue.put(done)
+
+        workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+        running = len(workers)
+        try:
+            while running:
+                item = await queue.get()
+                if item is done:
+                    running -= 1
+                    continue
+                yield item
+        finally:
+            # wait_for() in 3.11 drops a cancel that lands as the connect completes: that worker
+            # goes on, so keep draining until it sees `stopping` and exits
+            stopping.append(True)
+            for task in workers:
+                task.cancel()
+            while not all(task.done() for task in workers):
+                while not queue.empty():
+                    queue.get_nowait()
+                await asyncio.sleep(0)
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    async def scan_all(self, targets):
+        return [result async for result in self.scan(targets)]
+
+    @staticmethod
+    async def _resolve(loop, host, port):
+        for family in (socket.AF_INET, socket.AF_INET6):
+            try:
+                socket.inet_pton(family, host)
+                return family, (host, port)
+            except OSError:
+                continue
+        infos = await loop.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        if not infos:
+            raise OSError(f"no address for {host}")
+        family, _, _, _, address = infos[0]
+        return family, address
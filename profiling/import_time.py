@@ -0,0 +1,156 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# =============================================================================
+# import_time — startup cost of every DogeOpsPy module (user guide)
+# =============================================================================
+# Each module is imported in a fresh interpreter under `python -X importtime`, `repeat`
+# times, the fastest run counts (the others only add disk cache / scheduler noise).
+# Per module: cumulative import time (the module + everything it pulled in that wasn't
+# loaded yet) and the heaviest non-DogeOpsPy imports it triggered, i.e. what to make lazy.
+#
+# -----------------------------------------------------------------------------
+# Functions:
+# discover_modules()                   # -> ["DogeOpsPy.linux.ssh", ...], demos left out
+# measure(module, repeat=5)            # -> {"module", "ms", "deps": [(name, ms), ...], "error"}
+# measure_all(modules=None, repeat=5)  # -> [measure(...), ...]
+# table(results, baseline=None)        # printable table, with a delta column against an older run
+#
+# -----------------------------------------------------------------------------
+# QuickStart:
+# python -m DogeOpsPy.profiling.import_time
+# python -m DogeOpsPy.profiling.import_time --json startup.json            # keep a run
+# python -m DogeOpsPy.profiling.import_time --baseline startup.json        # compare against it
+# python -m DogeOpsPy.profiling.import_time --budget-ms 50 DogeOpsPy.ingress.nginx DogeOpsPy.linux.l4_port
+#
+# -----------------------------------------------------------------------------
+# NOTES:
+# 1) --budget-ms exits 1 when a module is over budget (or fails to import), for CI.
+# 2) A module whose dependency isn't installed shows up with its error instead of a time.
+#    Heavy deps loaded lazily (paramiko, yaml, urllib.request) don't show up at all, which
+#    is the point.
+
+PACKAGE = "DogeOpsPy"
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def discover_modules():
+    modules = []
+    for dirpath, dirnames, filenames in os.walk(ROOT):
+        dirnames[:] = sorted(d for d in dirnames if d not in ("demo", "__pycache__") and not d.startswith("."))
+        if "__init__.py" not in filenames:
+            continue
+        rel = os.path.relpath(dirpath, ROOT)
+        package = PACKAGE if rel == "." else ".".join([PACKAGE] + rel.split(os.sep))
+        for filename in sorted(filenames):
+            if filename.endswith(".py") and filename != "__init__.py":
+                modules.append(f"{package}.{filename[:-3]}")
+    return modules
+
+
+def parse_importtime(stderr):
+    """-X importtime output -> [(depth, name, cumulative_us)] in the order printed (children first)."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue  # header line
+        name = parts[2].rstrip()
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        rows.append((depth, name.strip(), int(parts[1])))
+    return rows
+
+
+def heavy_deps(rows, top=3):
+    """Outside imports done directly by DogeOpsPy modules, heaviest first."""
+    children = {}  # depth -> [(name, cumulative_us)] waiting for their parent line
+    deps = {}
+    for depth, name, cumulative in rows:
+        kids = children.pop(depth + 1, [])
+        if name.startswith(PACKAGE + ".") or name == PACKAGE:
+            for kid_name, kid_cumulative in kids:
+                if not kid_name.startswith(PACKAGE):
+                    deps[kid_name] = max(deps.get(kid_name, 0), kid_cumulative)
+        children.setdefault(depth, []).append((name, cumulative))
+    ranked = sorted(deps.items(), key=lambda item: item[1], reverse=True)[:top]
+    return [(name, cumulative / 1000) for name, cumulative in ranked]
+
+
+def _run_once(module):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(
+        [os.path.dirname(ROOT)] + [p for p in [os.environ.get("PYTHONPATH")] if p]))
+    env.pop("DOGE_TRACE", None)
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          capture_output=True, text=True, env=env)
+    rows = parse_importtime(proc.stderr)
+    if proc.returncode != 0:
+        error = [line for line in proc.stderr.splitlines() if line and not line.startswith("import time:")]
+        return None, rows, error[-1] if error else f"rc={proc.returncode}"
+    cumulative = next((c for _, name, c in rows if name == module), None)
+    return cumulative, rows, None
+
+
+def measure(module, repeat=5):
+    best, best_rows = None, []
+    for _ in range(max(1, repeat)):
+        cumulative, rows, error = _run_once(module)
+        if error:
+            return {"module": module, "ms": None, "deps": [], "error": error}
+        if cumulative is not None and (best is None or cumulative < best):
+            best, best_rows = cumulative, rows
+    return {"module": module, "ms": best / 1000 if best is not None else None,
+            "deps": heavy_deps(best_rows), "error": None}
+
+
+def measure_all(modules=None, repeat=5):
+    return [measure(module, repeat) for module in (modules or discover_modules())]
+
+
+def table(results, baseline=None):
+    before = {row["module"]: row["ms"] for row in baseline or []}
+    lines = [f"{'module':<40}{'ms':>9}{'delta':>9}  heaviest imports (ms)"]
+    for row in sorted(results, key=lambda r: -1 if r["ms"] is None else r["ms"], reverse=True):
+        if row["error"]:
+            lines.append(f"{row['module']:<40}{'-':>9}{'':>9}  {row['error']}")
+            continue
+        delta = ""
+        if before.get(row["module"]) is not None:
+            delta = f"{row['ms'] - before[row['module']]:+.1f}"
+        deps = ", ".join(f"{name} {ms:.1f}" for name, ms in row["deps"])
+        lines.append(f"{row['module']:<40}{row['ms']:>9.1f}{delta:>9}  {deps}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import time of DogeOpsPy modules, fresh interpreter each")
+    parser.add_argument("modules", nargs="*", help="default: every module but demos")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="write the results here")
+    parser.add_argument("--baseline", help="results of an earlier --json run, adds a delta column")
+    parser.add_argument("--budget-ms", type=float, help="exit 1 if a module takes longer (or fails)")
+    args = parser.parse_args(argv)
+
+    results = measure_all(args.modules or None, args.repeat)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print(table(results, baseline))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=1)
+    if args.budget_ms is not None:
+        over = [row["module"] for row in results if row["ms"] is None or row["ms"] > args.budget_ms]
+        if over:
+            print(f"over {args.budget_ms} ms: {', '.join(over)}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,291 @@
+import atexit
+import contextvars
+import functools
+import heapq
+import json
+import os
+import sys
+import threading
+import time
+
+# =============================================================================
+# trace — opt-in spans across pool / ssh / subprocess / parsing (user guide)
+# =============================================================================
+# Off by default. Off, every hook is one global check returning a shared no-op context
+# manager, nothing is recorded. On, each span records (name, start, duration, parent) and
+# the current span rides a contextvar: asyncio tasks inherit it, so a span opened in a
+# task is a child of whatever was open when the task was created.
+#
+# Built-in spans:
+#   pool.lease_wait / pool.lease_hold      LeasePoolV1.lease(): queueing for a lease / holding it
+#   ssh.connect                            DirectSSH / BastionJumpSSH __enter__ (handshake + auth, and on
+#                                          the bastion the hop to the target, its ssh.read spans nested)
+#   ssh.read                               BastionJumpSSH._read() polling for the prompt
+#   ssh.exec                               DirectSSH.exec_stream() (exec / exec_rc too)
+#   proc.run                               InteractiveProcV1.run()
+#   nginx.parse / nginx.server_dicts       nginx_tree tokenize+tree / tree -> server dicts
+#   envoy.load / envoy.server_dicts        envoy_loader.load_conf() / envoy.conf_to_server_dicts()
+#   envoy.config_dump                      envoy_admin config_dump -> conf
+#   pipeline.fetch                         InventoryPipelineV1 fetch of one host
+#
+# -----------------------------------------------------------------------------
+# Functions:
+# enable() / disable() / is_enabled()     # or DOGE_TRACE=1 in the environment (DOGE_TRACE=out.json also
+#                                         # writes a chrome trace at exit)
+# with span("my.stage", host=h): ...      # your own spans, any kwargs end up in the trace args
+# @traced("my.stage")                     # same, as a decorator (sync or async functions)
+# current().set(rc=rc)                    # add args to the innermost open span (no-op when off)
+# bind(fn)                                # fn that runs in the current context, for executors/threads
+# export_chrome(path)                     # chrome://tracing / Perfetto trace-event JSON
+# aggregate() / table()                   # {name: {count,total,avg,p50,p95,max}} / printable table
+# reset()
+#
+# -----------------------------------------------------------------------------
+# QuickStart:
+# from DogeOpsPy.profiling import trace
+# trace.enable()
+# asyncio.run(main())
+# print(trace.table())
+# trace.export_chrome("fleet_run.json")   # open in https://ui.perfetto.dev
+#
+# -----------------------------------------------------------------------------
+# NOTES:
+# 1) Threads don't inherit contextvars: loop.run_in_executor(pool, trace.bind(fn), ...) keeps
+#    the parent link, the timing is recorded either way.
+# 2) At most `max_events` spans are kept (enable(max_events=...)), the rest only count in `dropped`.
+# 3) Spans live in the process that made them: work done in a ProcessPoolExecutor worker
+#    (batch / pipeline parsing) isn't collected, parse_workers=1 keeps it in process.
+
+_enabled = False
+_events = []
+_max_events = 1_000_000
+_dropped = 0
+_epoch_ns = time.perf_counter_ns()
+_lanes = {}  # task / thread id -> [lane, spans open on it], gone once none is open
+_free_lanes = []  # heap of lanes given back, reused lowest first
+_lanes_lock = threading.Lock()
+_current = contextvars.ContextVar("doge_trace_span", default=None)
+_CO_COROUTINE = 0x80  # inspect.CO_COROUTINE, inspect itself costs more to import than all of this module
+
+
+def enable(max_events=1_000_000):
+    global _enabled, _max_events
+    _max_events = max_events
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    return _enabled
+
+
+def reset():
+    global _dropped
+    _events.clear()
+    with _lanes_lock:
+        _lanes.clear()
+        _free_lanes.clear()
+    _dropped = 0
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+    def set(self, **args):
+        pass
+
+
+_NO_SPAN = _NoSpan()
+
+
+def _acquire_lane():
+    # Chrome "X" events on one tid must nest, concurrent asyncio tasks get a lane each.
+    # A lane is only held while its task / thread has a span open, then it goes back to the
+    # pool: a long run with DOGE_TRACE=1 needs as many lanes as it ever had concurrent tasks.
+    asyncio = sys.modules.get("asyncio")  # never imported -> no tasks, don't pay for the import
+    try:
+        key = asyncio.current_task() if asyncio else None
+    except RuntimeError:
+        key = None
+    key = id(key) if key is not None else threading.get_ident()
+    entry = _lanes.get(key)
+    if entry is None:
+        with _lanes_lock:
+            lane = heapq.heappop(_free_lanes) if _free_lanes else len(_lanes) + 1
+            entry = _lanes[key] = [lane, 0]
+    entry[1] += 1  # only this task / thread touches its own entry, the lock is for the dict + pool
+    return key, entry[0]
+
+
+def _release_lane(key):
+    entry = _lanes.get(key)
+    if entry is None:
+        return  # reset() in between
+    entry[1] -= 1
+    if entry[1] <= 0:
+        with _lanes_lock:
+            if _lanes.get(key) is entry:
+                del _lanes[key]
+                heapq.heappush(_free_lanes, entry[0])
+
+
+class Span:
+    __slots__ = ("name", "args", "parent", "start", "token", "lane_key", "lane")
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+        self.parent = None
+        self.start = 0
+        self.token = None
+        self.lane_key = None
+        self.lane = 0
+
+    def set(self, **args):
+        self.args.update(args)
+
+    def __enter__(self):
+        self.parent = _current.get()
+        self.token = _current.set(self)
+        self.lane_key, self.lane = _acquire_lane()
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        global _dropped
+        end = time.perf_counter_ns()
+        try:
+            _current.reset(self.token)
+        except ValueError:
+            _current.set(self.parent)  # exited in another context (async generator closed elsewhere)
+        _release_lane(self.lane_key)
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        if len(_events) < _max_events:
+            _events.append((self.name, self.start, end - self.start, self.lane, os.getpid(),
+                            self.parent.name if self.parent else "", self.args))
+        else:
+            _dropped += 1
+        return False
+
+
+def span(name, **args):
+    if not _enabled:
+        return _NO_SPAN
+    return Span(name, args)
+
+
+def current():
+    # Innermost open span, for args only known inside a @traced function (rc, sizes)
+    if not _enabled:
+        return _NO_SPAN
+    return _current.get() or _NO_SPAN
+
+
+def traced(name=None):
+    def decorator(fn):
+        span_name = name or fn.__qualname__
+        if getattr(getattr(fn, "__code__", None), "co_flags", 0) & _CO_COROUTINE:
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                if not _enabled:
+                    return await fn(*args, **kwargs)
+                with Span(span_name, {}):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with Span(span_name, {}):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def bind(fn):
+    if not _enabled:
+        return fn
+    return functools.partial(contextvars.copy_context().run, fn)
+
+
+# ===== export =====
+def events():
+    return list(_events)
+
+
+def export_chrome(path=None):
+    """Trace-event JSON (chrome://tracing, Perfetto); written to `path` if given, returned either way."""
+    trace_events = []
+    for name, start, duration, lane, pid, parent, args in list(_events):
+        event_args = dict(args)
+        if parent:
+            event_args["parent"] = parent
+        trace_events.append({
+            "name": name,
+            "cat": name.split(".", 1)[0],
+            "ph": "X",
+            "ts": (start - _epoch_ns) / 1000,
+            "dur": duration / 1000,
+            "pid": pid,
+            "tid": lane,
+            "args": {k: v if isinstance(v, (str, int, float, bool)) or v is None else str(v)
+                     for k, v in event_args.items()},
+        })
+    document = {"traceEvents": trace_events, "displayTimeUnit": "ms", "otherData": {"dropped": _dropped}}
+    if path:
+        with open(path, "w") as f:
+            json.dump(document, f)
+    return document
+
+
+def aggregate():
+    durations = {}
+    errors = {}
+    for name, _, duration, _, _, _, args in list(_events):
+        durations.setdefault(name, []).append(duration / 1e9)
+        if "error" in args:
+            errors[name] = errors.get(name, 0) + 1
+    result = {}
+    for name, values in durations.items():
+        values.sort()
+        total = sum(values)
+        result[name] = {
+            "count": len(values),
+            "errors": errors.get(name, 0),
+            "total": total,
+            "avg": total / len(values),
+            "p50": values[len(values) // 2],
+            "p95": values[min(len(values) - 1, int(len(values) * 0.95))],
+            "max": values[-1],
+        }
+    return dict(sorted(result.items(), key=lambda item: item[1]["total"], reverse=True))
+
+
+def table():
+    rows = aggregate()
+    lines = [f"{'span':<24}{'count':>8}{'errors':>8}{'total s':>10}{'avg ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}"]
+    for name, row in rows.items():
+        lines.append(f"{name:<24}{row['count']:>8}{row['errors']:>8}{row['total']:>10.3f}{row['avg'] * 1000:>10.2f}"
+                     f"{row['p50'] * 1000:>10.2f}{row['p95'] * 1000:>10.2f}{row['max'] * 1000:>10.2f}")
+    if _dropped:
+        lines.append(f"({_dropped} spans dropped, over max_events)")
+    return "\n".join(lines)
+
+
+_env = os.environ.get("DOGE_TRACE", "")
+if _env and _env != "0":
+    enable()
+    if _env.endswith(".json"):
+        atexit.register(export_chrome, _env)